@@ -12,6 +12,7 @@
         'security/ir.model.access.csv',
         'views/jwt_token_views.xml',
         'data/default_config.xml',
+        'data/ir_cron_data.xml',
     ],
     'external_dependencies': {
         'python': ['pyjwt'],
@@ -0,0 +1,57 @@
+"""CPU gasto x bytes economizados na compressão das respostas.
+
+Comprime páginas sintéticas de visitas (JSON gerado por ``json_utils.dumps``)
+com cada encoding disponível em ``utils/compression.py``, nos níveis
+configurados e em alguns vizinhos, e mostra o tempo por página, o tamanho
+final e a economia. A linha marcada com ``*`` é o nível usado pela API.
+brotli e zstd só aparecem quando os pacotes estão instalados.
+
+Uso::
+
+    python benchmarks/bench_compression.py [--rows 100 1000 5000]
+"""
+import argparse
+import gzip
+
+from common import best_of, load_util, visits_page
+
+compression = load_util("compression")
+json_utils = load_util("json_utils")
+
+
+def candidates():
+    yield "gzip", compression.GZIP_LEVEL, [1, compression.GZIP_LEVEL, 9], (
+        lambda body, level: gzip.compress(body, compresslevel=level))
+    if compression.brotli is not None:
+        brotli = compression.brotli
+        yield "br", compression.BROTLI_QUALITY, [1, compression.BROTLI_QUALITY, 11], (
+            lambda body, level: brotli.compress(body, quality=level))
+    if compression.zstandard is not None:
+        zstandard = compression.zstandard
+        yield "zstd", compression.ZSTD_LEVEL, [1, compression.ZSTD_LEVEL, 10], (
+            lambda body, level: zstandard.ZstdCompressor(level=level).compress(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    print("%8s %-6s %6s %12s %12s %10s %14s" % (
+        "linhas", "enc", "nível", "ms/página", "bytes", "economia", "KB salvos/ms"))
+    for rows in args.rows:
+        body = json_utils.dumps(visits_page(rows))
+        print("%8d %-6s %6s %12s %12d %10s %14s" % (rows, "-", "-", "-", len(body), "-", "-"))
+        for name, configured, levels, compress in candidates():
+            for level in levels:
+                elapsed = best_of(lambda: compress(body, level), number=3)
+                size = len(compress(body, level))
+                saved = len(body) - size
+                print("%8d %-6s %5d%s %12.2f %12d %9.1f%% %14.1f" % (
+                    rows, name, level, "*" if level == configured else " ",
+                    elapsed * 1000, size, 100.0 * saved / len(body), saved / 1024 / (elapsed * 1000),
+                ))
+
+
+if __name__ == "__main__":
+    main()
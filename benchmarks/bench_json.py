@@ -0,0 +1,49 @@
+"""Microbenchmark do encoder JSON das respostas (orjson x json).
+
+Serializa páginas sintéticas de visitas com as duas implementações de
+``utils/json_utils.dumps`` (mesmas opções: UTF-8, datas em ISO 8601) e
+mostra o tempo por página e o tamanho gerado. Sem orjson instalado, mede
+apenas o ``json`` da biblioteca padrão.
+
+Uso::
+
+    python benchmarks/bench_json.py [--rows 100 1000 5000]
+"""
+import argparse
+import json
+
+from common import best_of, load_util, visits_page
+
+json_utils = load_util("json_utils")
+orjson = json_utils.orjson
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, ensure_ascii=False, default=json_utils._default).encode()
+
+
+def orjson_dumps(data):
+    return orjson.dumps(data, default=json_utils._default, option=json_utils._ORJSON_OPTIONS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    engines = [("json", stdlib_dumps)]
+    if orjson is not None:
+        engines.append(("orjson", orjson_dumps))
+    print("engine em uso pela API: %s" % json_utils.ENGINE)
+    print("%8s %-8s %12s %12s %10s" % ("linhas", "engine", "ms/página", "bytes", "ganho"))
+    for rows in args.rows:
+        page = visits_page(rows)
+        baseline = None
+        for name, dumps in engines:
+            elapsed = best_of(lambda: dumps(page))
+            baseline = baseline or elapsed
+            print("%8d %-8s %12.2f %12d %9.1fx" % (rows, name, elapsed * 1000, len(dumps(page)), baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Logins por worker com e sem o preenchimento fixo de 0,5 s.
+
+Um worker HTTP atende uma requisição por vez, então logins por segundo por
+worker = 1 / tempo médio de ``_authenticate_user``. O script mede a versão
+atual (hash de referência para logins inexistentes) e a versão antiga, que
+completava cada tentativa com ``time.sleep`` até 0,5 s, para um login
+existente com senha errada, um login inexistente e, com ``--password``, um
+login válido. Nada é gravado: a transação é desfeita ao final.
+
+Uso (com o addon no addons_path da configuração)::
+
+    python benchmarks/bench_login.py -c /etc/odoo/odoo.conf -d banco --login admin
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+import odoo
+from odoo import SUPERUSER_ID, api
+from odoo.tools import config
+
+
+def legacy_authenticate(env, login, password):
+    # Implementação anterior, mantida aqui apenas para comparação
+    try:
+        start = datetime.now()
+        uid = env['res.users'].sudo().authenticate(env.cr.dbname, login, password, {})
+        elapsed = (datetime.now() - start).total_seconds()
+        time.sleep(max(0, 0.5 - elapsed))
+        return uid
+    except Exception:
+        time.sleep(0.5)
+        return None
+
+
+def measure(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.mean(timings), statistics.pstdev(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-c', '--config', required=True)
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--login', required=True, help="login existente")
+    parser.add_argument('--password', help="senha correta do login (opcional)")
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    config.parse_config(['-c', args.config, '-d', args.database])
+    from odoo.addons.odoo_export_api.services.auth_service import AuthService
+
+    cases = [
+        ("senha errada", args.login, "senha-incorreta"),
+        ("login inexistente", "inexistente-%d@example.com" % time.time(), "senha-incorreta"),
+    ]
+    if args.password:
+        cases.append(("login válido", args.login, args.password))
+
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        service = AuthService(env)
+        print("%-18s %-10s %12s %10s %16s" % ("caso", "versão", "média (ms)", "desvio", "logins/s/worker"))
+        for label, login, password in cases:
+            for version, func in (
+                ("antiga", lambda: legacy_authenticate(env, login, password)),
+                ("atual", lambda: service._authenticate_user(login, password)),
+            ):
+                mean, stdev = measure(func, args.rounds)
+                print("%-18s %-10s %12.1f %10.1f %16.2f" % (label, version, mean * 1000, stdev * 1000, 1 / mean))
+        cr.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Consultas e tempo de /api/sales-teams/ com 500 equipes x 30 membros.
+
+Cria as equipes e os vínculos numa transação que é desfeita ao final e, para
+cada tamanho de página, compara a montagem dos corretores antiga (laço por
+equipe em ``team.member_ids``) com a atual
+(``SalesTeamExportController._get_brokers_by_team``, um search_read dos
+vínculos e um read dos usuários). O cache do environment é descartado antes
+de cada medição, como numa requisição nova.
+
+Uso (com o addon no addons_path da configuração)::
+
+    python benchmarks/bench_sales_teams.py -c /etc/odoo/odoo.conf -d banco
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import odoo
+from odoo import SUPERUSER_ID, api
+from odoo.tools import config
+
+
+def build_fixtures(env, teams, members, users):
+    env['ir.config_parameter'].set_param('sales_team.membership_multi', True)
+    pool = env['res.users'].with_context(no_reset_password=True).create([
+        {'name': 'Corretor bench %d' % i, 'login': 'bench.corretor%d@example.com' % i}
+        for i in range(users)
+    ])
+    team_records = env['crm.team'].create([{'name': 'Equipe bench %d' % i} for i in range(teams)])
+    env['crm.team.member'].create([
+        {'crm_team_id': team.id, 'user_id': pool[(index + offset) % users].id}
+        for index, team in enumerate(team_records)
+        for offset in range(members)
+    ])
+    env.flush_all()
+
+
+def legacy_page(env, page_size):
+    # Implementação anterior, mantida aqui apenas para comparação
+    result = []
+    for team in env['crm.team'].search([], limit=page_size):
+        result.append({
+            "id": team.id,
+            "name": team.name,
+            "brokers": [
+                {"id": user.id, "name": user.name, "email": user.email or ""}
+                for user in team.member_ids
+            ],
+        })
+    return result
+
+
+def current_page(env, controller, page_size):
+    teams = env['crm.team'].search([], limit=page_size)
+    brokers_by_team = controller._get_brokers_by_team(teams.ids)
+    return [
+        {"id": team.id, "name": team.name, "brokers": brokers_by_team.get(team.id, [])}
+        for team in teams
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-c', '--config', required=True)
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--teams', type=int, default=500)
+    parser.add_argument('--members', type=int, default=30)
+    parser.add_argument('--users', type=int, default=300, help="corretores distintos distribuídos entre as equipes")
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[1, 100, 500])
+    args = parser.parse_args()
+
+    config.parse_config(['-c', args.config, '-d', args.database])
+    from odoo.addons.odoo_export_api.controllers.sales_team_controller import SalesTeamExportController
+    from odoo.addons.odoo_export_api.utils.query_stats import QueryStats
+
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        build_fixtures(env, args.teams, args.members, args.users)
+        controller = SalesTeamExportController()
+        # O controller lê request.env; fora de uma requisição HTTP basta um
+        # objeto com o environment no topo da pilha de requests
+        odoo.http._request_stack.push(SimpleNamespace(env=env))
+        try:
+            print("%10s %-8s %10s %12s %12s" % ("page_size", "versão", "consultas", "ms", "corretores"))
+            for page_size in args.page_sizes:
+                for version, func in (
+                    ("antiga", lambda: legacy_page(env, page_size)),
+                    ("atual", lambda: current_page(env, controller, page_size)),
+                ):
+                    env.invalidate_all()
+                    start = time.perf_counter()
+                    with QueryStats(cr) as stats:
+                        data = func()
+                    elapsed = time.perf_counter() - start
+                    brokers = sum(len(team["brokers"]) for team in data)
+                    print("%10d %-8s %10d %12.1f %12d" % (page_size, version, stats.count, elapsed * 1000, brokers))
+        finally:
+            odoo.http._request_stack.pop()
+            cr.rollback()
+
+
+if __name__ == '__main__':
+    main()
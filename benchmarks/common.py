@@ -0,0 +1,71 @@
+"""Utilitários compartilhados pelos benchmarks que não precisam de banco.
+
+Os módulos de ``utils`` usados aqui não dependem do Odoo; são carregados
+pelo caminho do arquivo, sem importar o addon (e, com ele, o Odoo).
+"""
+import datetime
+import importlib.util
+import os
+import random
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDIA_NAMES = ["Facebook", "Google", "Instagram", "Outdoor", "Indicação", "Portal"]
+SIZES = ["40 m²", "52 m²", "65 m²", "78 m²", "90 m²", "120 m²"]
+
+
+def load_util(name):
+    path = os.path.join(ADDON_DIR, "utils", name + ".py")
+    spec = importlib.util.spec_from_file_location("bench_" + name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def visits_page(rows, seed=42):
+    """Página sintética no formato de /api/visits/ (mesmas chaves e tipos)."""
+    rnd = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1, 8, 0, 0)
+    data = []
+    for i in range(rows):
+        created = base + datetime.timedelta(minutes=rnd.randint(0, 500000))
+        data.append({
+            "id": 100000 + i,
+            "third_party_id": rnd.choice([None, "TP-%06d" % rnd.randint(0, 999999)]),
+            "broker_name": "Corretor %d - Equipe %d" % (rnd.randint(1, 300), rnd.randint(1, 20)),
+            "manager_name": "Gerente %d" % rnd.randint(1, 20),
+            "superintendent_name": None,
+            "indication_broker_name": rnd.choice([None, "Corretor %d" % rnd.randint(1, 300)]),
+            "sales_company_id": rnd.randint(1, 20),
+            "product_id": rnd.randint(1, 60),
+            "customer_id": rnd.randint(1, 200000),
+            "type_of": {"name": rnd.choice(["Visita", "Retorno"]), "sub_type_of": rnd.choice([None, "Indicação corretor"])},
+            "out_of_service": rnd.random() < 0.1,
+            "created": created,
+            "justify_id": None,
+            "owner": None,
+            "created_by": rnd.randint(1, 300),
+            "changed_by": rnd.randint(1, 300),
+            "changed_when": created + datetime.timedelta(hours=rnd.randint(0, 48)),
+            "main_media_id": rnd.choice([None, "M%03d" % rnd.randint(1, 200)]),
+            "deleted": rnd.random() < 0.05,
+            "corretor_account_id_crm": None,
+            "recebido_crm": False,
+            "broker_email": "corretor%d@example.com" % rnd.randint(1, 300),
+            "product_type_id": None,
+            "visit_size": {"Tamanhos": rnd.sample(SIZES, rnd.randint(0, 3))},
+        })
+    return {"data": data, "page": 1, "page_size": rows, "has_next": True, "total_count": rows * 40}
+
+
+def best_of(func, repeat=5, number=10):
+    """Menor tempo médio por chamada (s) entre ``repeat`` séries de ``number``."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -5,4 +5,5 @@ from . import visits_controller
 from . import sales_team_controller
 from . import interest_products_controller
 from . import midia_controller
-from . import survey_questions_controller
\ No newline at end of file
+from . import survey_questions_controller
+from . import export_jobs_controller
\ No newline at end of file
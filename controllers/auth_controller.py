@@ -1,13 +1,56 @@
 from odoo import http
-from odoo.http import request, Response
-import json
+from odoo.http import request
 import logging
 from functools import wraps
-from datetime import datetime, timedelta
+import os
 from odoo.exceptions import ValidationError
+from odoo.tools import config
+
+from ..utils.http_utils import json_response
+from ..utils.rate_limiter import SlidingWindowRateLimiter
 
 _logger = logging.getLogger(__name__)
 
+_rate_limiter = None
+
+
+def _get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = SlidingWindowRateLimiter(
+            os.path.join(config['data_dir'], 'odoo_export_api', 'rate_limit.sqlite3')
+        )
+    return _rate_limiter
+
+
+def _unauthorized_response(message):
+    return json_response({"error": message}, status=401)
+
+
+def token_required(f):
+    """Valida o Bearer token antes de executar o endpoint.
+
+    Tokens inválidos são rejeitados sem formatar traceback, e os claims
+    decodificados ficam disponíveis em ``request.jwt_claims``.
+    """
+    @wraps(f)
+    def wrapper(self, *args, **kwargs):
+        auth_header = request.httprequest.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return _unauthorized_response("Token não fornecido no header de autorização")
+        token = auth_header[7:].strip()
+        if not token:
+            return _unauthorized_response("Token não fornecido no header de autorização")
+        try:
+            request.jwt_claims = request.env["auth.model"].verify_token(token)
+        except ValidationError as ve:
+            _logger.info("Token rejeitado em %s: %s", request.httprequest.path, ve)
+            return _unauthorized_response("Token inválido")
+        return f(self, *args, **kwargs)
+
+    return wrapper
+
+
 class AuthController(http.Controller):
 
     _RATE_LIMIT = {
@@ -22,23 +65,13 @@ class AuthController(http.Controller):
         headers = self._get_security_headers()
         if extra_headers:
             headers.update(extra_headers)
-        return Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=status,
-            mimetype='application/json',
-            headers=headers
-        )
+        return json_response(response_data, status=status, headers=headers.items())
 
     def _success_response(self, data, status=200, extra_headers=None):
         headers = self._get_security_headers()
         if extra_headers:
             headers.update(extra_headers)
-        return Response(
-            json.dumps(data, ensure_ascii=False),
-            status=status,
-            mimetype='application/json',
-            headers=headers
-        )
+        return json_response(data, status=status, headers=headers.items())
 
     def _get_security_headers(self):
         return {
@@ -88,24 +121,23 @@ class AuthController(http.Controller):
         return wrapper
 
     def _check_rate_limit(self, endpoint, ip):
-        cache_key = f'rate_limit:{endpoint}:{ip}'
-        now = datetime.now()
-        if not hasattr(request, '_rate_limit_cache'):
-            request._rate_limit_cache = {}
-        attempts, last_time = request._rate_limit_cache.get(cache_key, (0, now))
+        # Retorna 0 se permitido, senão os segundos para o header Retry-After
+        cache_key = f'rate_limit:{request.db}:{endpoint}:{ip}'
         max_attempts, max_time = self._RATE_LIMIT.get(endpoint, (1, 300))
-        if now - last_time > timedelta(seconds=max_time):
-            attempts = 0
-        if attempts >= max_attempts:
-            raise ValidationError("Muitas requisições. Tente novamente mais tarde.")
-        request._rate_limit_cache[cache_key] = (attempts + 1, now)
-        return True
+        return _get_rate_limiter().hit(cache_key, max_attempts, max_time)
 
     @http.route('/api/auth/', type='http', auth='none', methods=['POST'], csrf=False)
     @handle_api_errors
     def generate_token(self, **kwargs):
         ip = request.httprequest.remote_addr
-        self._check_rate_limit('auth', ip)
+        retry_after = self._check_rate_limit('auth', ip)
+        if retry_after:
+            headers = self._get_cors_headers()
+            headers['Retry-After'] = str(retry_after)
+            return self._error_response(
+                "Muitas requisições. Tente novamente mais tarde.", 429, 'rate_limited',
+                extra_headers=headers
+            )
 
         post_data = request.httprequest.get_json(force=True, silent=True) or {}
         login, password = self._validate_json_input(post_data)
@@ -118,12 +150,6 @@ class AuthController(http.Controller):
 
     @http.route('/api/ping', type='http', auth='none', methods=['GET'], csrf=False)
     @handle_api_errors
+    @token_required
     def ping(self, **kw):
-        auth_header = request.httprequest.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            raise ValidationError("Cabeçalho Authorization ausente ou inválido")
-        token = auth_header.split(' ')[1].strip()
-        if not token:
-            raise ValidationError("Token vazio")
-        request.env['auth.model'].sudo().verify_token(token)
-        return self._success_response({"status": "pong"}, headers={'Cache-Control': 'no-store'})
+        return self._success_response({"status": "pong"}, extra_headers={'Cache-Control': 'no-store'})
@@ -1,136 +1,117 @@
 from odoo import http
 from odoo.http import request, Controller
-from odoo.fields import Datetime
-from datetime import datetime, time
-import pytz
-import json
 import logging
 
-from ..utils.date_utils import parse_date
+from ..services.client_export_service import ClientExportService
+from ..services.export_domains import build_client_domain
+from ..utils.change_feed import read_changes
+from ..utils.http_utils import json_response
+from ..utils.pagination import (
+    count_records,
+    decode_cursor,
+    keyset_search,
+    offset_search,
+    parse_count_mode,
+)
+from ..utils.query_stats import instrument_queries
+from ..utils.streaming import ndjson_response
+from .auth_controller import token_required
 
 _logger = logging.getLogger(__name__)
 
 class ClientsController(Controller):
 
     @http.route('/api/clients/', type='http', auth='none', methods=['GET'], csrf=False)
+    @instrument_queries
+    @token_required
     def get_clients(self):
-        # 1) Autenticação via Bearer token
-        auth_header = request.httprequest.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return request.make_response(
-                json.dumps({"error": "Token não fornecido no header de autorização"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-        token = auth_header.split(' ', 1)[1].strip()
-        try:
-            request.env['auth.model'].sudo().verify_token(token)
-        except Exception as e:
-            _logger.exception("Token inválido: %s", e)
-            return request.make_response(
-                json.dumps({"error": "Token inválido"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-
         # 2) Parâmetros de paginação (com defaults)
         try:
             page = int(request.params.get('page', 1))
             page_size = int(request.params.get('page_size', 20))
         except ValueError:
-            return request.make_response(
-                json.dumps({"error": "Os parâmetros 'page' e 'page_size' devem ser inteiros."}),
-                status=400,
-                headers=[('Content-Type', 'application/json')]
+            return json_response(
+                {"error": "Os parâmetros 'page' e 'page_size' devem ser inteiros."},
+                status=400
             )
+        try:
+            count_mode = parse_count_mode(request.params.get('count'))
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
 
-        start_date_str   = request.params.get('start_date')
-        end_date_str     = request.params.get('end_date')
+        # 3) Filtro de datas e 4) filtros fixos de clientes
+        try:
+            domain = build_client_domain(request.params)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
 
-        domain = []
+        _logger.info("Domínio final de busca: %s", domain)
 
-        # 3a) Filtro de datas
-        if start_date_str and end_date_str:
+        # 5a) changed_since: feed incremental por (write_date, id), incluindo
+        # parceiros arquivados (deleted=True) e os ids excluídos desde o watermark
+        changed_since = request.params.get('changed_since')
+        if changed_since:
             try:
-                # parse_date suporta YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS e DD/MM/YYYY
-                start_date = parse_date(start_date_str)
-                end_date   = parse_date(end_date_str)
-
-                local_tz = pytz.timezone("America/Sao_Paulo")
-                # início do dia sem microssegundos
-                start_dt = local_tz.localize(datetime.combine(start_date, time.min))
-                # fim do dia às 23:59:59
-                end_dt   = local_tz.localize(datetime.combine(end_date, time(23, 59, 59)))
-
-                # converte para UTC e formata como string que o Odoo entende
-                start_utc = start_dt.astimezone(pytz.utc)
-                end_utc   = end_dt.astimezone(pytz.utc)
-
-                domain.append(('create_date', '>=', Datetime.to_string(start_utc)))
-                domain.append(('create_date', '<=', Datetime.to_string(end_utc)))
-
-                _logger.info("Filtro de datas aplicado: %s", domain)
-            except Exception as e:
-                _logger.exception("Erro ao converter datas: %s", e)
-                return request.make_response(
-                    json.dumps({
-                        "error": "Erro ao converter as datas. Use um dos formatos: "
-                                 "YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS ou DD/MM/YYYY."
-                    }),
-                    status=400,
-                    headers=[("Content-Type", "application/json")]
+                partners, deleted_ids, next_changed_since, has_next = read_changes(
+                    request.env['res.partner'].sudo(), domain, changed_since, page_size
                 )
-            
+            except ValueError as e:
+                return json_response({"error": str(e)}, status=400)
+            return json_response({
+                "data": ClientExportService(request.env).serialize(partners),
+                "deleted_ids": deleted_ids,
+                "changed_since": changed_since,
+                "next_changed_since": next_changed_since,
+                "page_size": page_size,
+                "has_next": has_next,
+            })
 
-        # 4) Filtros fixos: remove parceiros já ligados a usuários e sem is_company
-        users = request.env['res.users'].sudo().search([])
-        removed_partner_ids = users.mapped('partner_id').ids
-        domain += [
-            ('id', 'not in', removed_partner_ids),
-            ('is_company', '=', False),
-        ]
+        cursor = request.params.get('cursor')
 
-        _logger.info("Domínio final de busca: %s", domain)
+        # 5b) format=ndjson: todo o filtro em lotes, um cliente por linha, sem
+        # paginação ('cursor' opcional retoma após o último id recebido)
+        if request.params.get('format') == 'ndjson':
+            try:
+                after_id = decode_cursor(cursor)
+            except ValueError as e:
+                return json_response({"error": str(e)}, status=400)
+            return ndjson_response(
+                request.env, 'res.partner', domain,
+                lambda env, partners: ClientExportService(env).serialize(partners),
+                after_id=after_id,
+            )
 
-        # 5) Busca com paginação
-        offset = (page - 1) * page_size
+        # 5c) Busca com paginação (offset, ou keyset quando 'cursor' é informado)
         Partner = request.env['res.partner'].sudo()
-        partners = Partner.search(domain, offset=offset, limit=page_size)
+        if cursor is None:
+            offset = (page - 1) * page_size
+            partners, has_next = offset_search(Partner, domain, offset, page_size)
+        else:
+            try:
+                partners, next_cursor = keyset_search(Partner, domain, cursor, page_size)
+            except ValueError as e:
+                return json_response({"error": str(e)}, status=400)
 
         # 6) Monta resposta JSON
-        data = []
-        for p in partners:
-            street = ' '.join(filter(None, [p.street, p.street2]))
-            data.append({
-                "id": p.id,
-                "third_party_id": p.third_party_id or None,
-                "name": p.name,
-                "birth_date": p.dob.isoformat() if p.dob else None,
-                "address": street,
-                "address_number": p.building_number,
-                "address_city": p.city,
-                "address_state": p.state_id.name if p.state_id else None,
-                "address_zip_code": p.zip,
-                "email": p.email,
-                "cpf": p.vat,
-                "cel": p.phone,
-                "gender": p.gender,
-                "changed_when": p.write_date.isoformat() if p.write_date else None,
-                "created": p.create_date.isoformat() if p.create_date else None,
-                "accept_info": True,
-                "corretor_account_id_crm": None,
-            })
-
-        total_count = Partner.search_count(domain)
-        has_next = offset + page_size < total_count
+        data = ClientExportService(request.env).serialize(partners)
 
-        return request.make_response(
-            json.dumps({
+        total_count = count_records(Partner, domain, count_mode)
+        if cursor is None:
+            response_data = {
                 "data": data,
                 "page": page,
                 "page_size": page_size,
                 "has_next": has_next,
                 "total_count": total_count
-            }),
-            headers=[('Content-Type', 'application/json')]
-        )
+            }
+        else:
+            response_data = {
+                "data": data,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "page_size": page_size,
+                "has_next": next_cursor is not None,
+                "total_count": total_count
+            }
+
+        return json_response(response_data)
@@ -0,0 +1,99 @@
+from odoo import http
+from odoo.http import request
+from werkzeug.utils import send_file
+import json
+import logging
+
+from ..utils.http_utils import json_response
+from ..utils.query_stats import instrument_queries
+from .auth_controller import token_required
+
+_logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+class ExportJobsController(http.Controller):
+    """Exportações em massa assíncronas.
+
+    O cliente cria o job (endpoint, filtros e formato), consulta o status e,
+    quando pronto, baixa o arquivo gzip gerado pelo cron fora do pool de
+    workers HTTP. O download aceita Range para retomar transferências.
+    """
+
+    def _get_job(self, job_id):
+        # Cada usuário só enxerga os próprios jobs
+        return request.env["export.job"].sudo().search([
+            ("id", "=", job_id),
+            ("user_id", "=", request.jwt_claims.get("user_id")),
+        ], limit=1)
+
+    @http.route("/api/export/jobs/", type="http", auth="none", methods=["POST"], csrf=False)
+    @instrument_queries
+    @token_required
+    def create_job(self):
+        data = request.httprequest.get_json(force=True, silent=True)
+        if not isinstance(data, dict):
+            return json_response({"error": "Formato JSON inválido"}, status=400)
+        endpoint = data.get("endpoint")
+        file_format = data.get("format") or "ndjson"
+        filters = data.get("filters") or {}
+        if file_format not in EXPORT_FORMATS:
+            return json_response(
+                {"error": "O campo 'format' deve ser um dos valores: %s." % ", ".join(EXPORT_FORMATS)},
+                status=400,
+            )
+
+        Job = request.env["export.job"].sudo()
+        try:
+            # Valida os filtros já na criação, e não só quando o cron rodar
+            Job._build_domain(endpoint, filters)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
+
+        job = Job.create({
+            "endpoint": endpoint,
+            "file_format": file_format,
+            "filters": json.dumps(filters),
+            "user_id": request.jwt_claims.get("user_id"),
+        })
+        # Antecipa a próxima execução do cron em vez de esperar o intervalo
+        request.env.ref("odoo_export_api.ir_cron_process_export_jobs").sudo()._trigger()
+        return json_response(
+            job._to_api(), status=202,
+            headers=[("Location", f"/api/export/jobs/{job.id}/")],
+        )
+
+    @http.route("/api/export/jobs/<int:job_id>/", type="http", auth="none", methods=["GET"], csrf=False)
+    @instrument_queries
+    @token_required
+    def get_job(self, job_id):
+        job = self._get_job(job_id)
+        if not job:
+            return json_response({"error": "Job de exportação não encontrado."}, status=404)
+        return json_response(job._to_api())
+
+    @http.route("/api/export/jobs/<int:job_id>/download", type="http", auth="none", methods=["GET"], csrf=False)
+    @token_required
+    def download_job(self, job_id):
+        job = self._get_job(job_id)
+        if not job:
+            return json_response({"error": "Job de exportação não encontrado."}, status=404)
+        if job.state != "done":
+            return json_response(
+                {"error": "O arquivo ainda não está disponível.", "state": job.state},
+                status=409,
+            )
+        try:
+            # conditional=True: responde Range (206), If-Range e If-None-Match
+            return send_file(
+                job.file_path,
+                request.httprequest.environ,
+                mimetype="application/gzip",
+                as_attachment=True,
+                download_name=f"export_{job.id}_{job.endpoint}.{job.file_format}.gz",
+                conditional=True,
+            )
+        except FileNotFoundError:
+            _logger.warning("Arquivo do job de exportação %s não encontrado: %s", job.id, job.file_path)
+            return json_response({"error": "Arquivo de exportação expirado."}, status=410)
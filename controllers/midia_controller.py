@@ -1,60 +1,86 @@
 from odoo import http
 from odoo.http import request, Response, Controller
-import json
 import logging
 
+from ..utils.cache_utils import TTLCache
+from ..utils.http_utils import (
+    etag_matches,
+    json_response,
+    not_modified_response,
+    reference_etag,
+    table_fingerprint,
+)
+from ..utils.json_utils import dumps
+from ..utils.pagination import count_records, offset_search, parse_count_mode
+from ..utils.query_stats import instrument_queries
+from .auth_controller import token_required
+
 _logger = logging.getLogger(__name__)
 
+MEDIA_FIELDS = [
+    'nome_midia', 'cod_midia1', 'cod_midia2',
+    'cod_midia3', 'cod_midia4', 'cod_midia5', 'cod_midia6'
+]
+
+# Respostas já serializadas, indexadas pelo ETag (que muda com os dados)
+_media_snapshots = TTLCache(maxsize=64, ttl=3600)
+
+
 class CompanyMediaController(http.Controller):
     @http.route('/api/company-media/', type='http', auth='none', methods=['GET'], csrf=False)
+    @instrument_queries
+    @token_required
     def get_company_media(self):
-        # Validação do token via header "Authorization"
-        auth_header = request.httprequest.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return request.make_response(
-                json.dumps({"error": "Token não fornecido no header de autorização"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-        token = auth_header.split(' ')[1].strip()
-        try:
-            request.env['auth.model'].sudo().verify_token(token)
-        except Exception as e:
-            _logger.exception("Token inválido: %s", e)
-            return request.make_response(
-                json.dumps({"error": "Token inválido"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-        
         try:
             page = int(request.params.get('page', 1))
             limit = int(request.params.get('page_size', 100))
         except ValueError:
-            return request.make_response(
-                json.dumps({"error": "Os parâmetros 'page' e 'limit' devem ser números inteiros."}),
-                status=400,
-                headers=[('Content-Type', 'application/json')]
+            return json_response(
+                {"error": "Os parâmetros 'page' e 'limit' devem ser números inteiros."},
+                status=400
             )
+        try:
+            count_mode = parse_count_mode(request.params.get('count'))
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
+
+        # Dados de referência: a validação pelo fingerprint das tabelas evita
+        # refazer leitura e serialização quando nada mudou desde o último poll
+        Company = request.env['res.company'].sudo()
+        Midia = request.env[Company._fields['midia_ids'].comodel_name].sudo()
+        etag = reference_etag(
+            [table_fingerprint(Company), table_fingerprint(Midia)], page, limit, count_mode,
+        )
+        if etag_matches(etag):
+            return not_modified_response(etag)
+        body = _media_snapshots.get(etag)
+        if body is None:
+            body = self._build_company_media(Company, Midia, page, limit, count_mode)
+            _media_snapshots.set(etag, body)
+
+        return json_response(body, headers=[('ETag', etag)])
+
+    def _build_company_media(self, Company, Midia, page, limit, count_mode):
         offset = (page - 1) * limit
-        companies = request.env['res.company'].sudo().search([], offset=offset, limit=limit)
-        total_count = request.env['res.company'].sudo().search_count([])
-        
+        companies, has_next = offset_search(Company, [], offset, limit)
+        total_count = count_records(Company, [], count_mode)
+
+        # Todas as mídias da página em um único read, agrupadas por company
+        company_rows = companies.read(['name', 'midia_ids'], load=None)
+        media_by_id = {
+            media['id']: media
+            for media in Midia.browse([m for c in company_rows for m in c['midia_ids']]).read(MEDIA_FIELDS)
+        }
+
         result = []
-        for comp in companies:
-            media_records = comp.midia_ids.read([
-                'nome_midia', 'cod_midia1', 'cod_midia2',
-                'cod_midia3', 'cod_midia4', 'cod_midia5', 'cod_midia6'
-            ])
+        for comp in company_rows:
             comp_data = {
-                "company_id": comp.id,
-                "company_name": comp.name,
-                "media": media_records
+                "company_id": comp['id'],
+                "company_name": comp['name'],
+                "media": [media_by_id[media_id] for media_id in comp['midia_ids']]
             }
             result.append(comp_data)
-        
-        has_next = offset + limit < total_count
-        
+
         response_data = {
             "data": result,
             "page": page,
@@ -62,8 +88,4 @@ class CompanyMediaController(http.Controller):
             "total_count": total_count,
             "has_next": has_next
         }
-        
-        return request.make_response(
-            json.dumps(response_data, ensure_ascii=False),
-            headers=[('Content-Type', 'application/json')]
-        )
+        return dumps(response_data)
@@ -1,40 +1,80 @@
 from odoo import http
 from odoo.http import request
-import json
 import logging
+from ..utils.http_utils import (
+    etag_matches,
+    json_response,
+    not_modified_response,
+    reference_etag,
+    table_fingerprint,
+)
+from ..utils.query_stats import instrument_queries
+from .auth_controller import token_required
 
 
 _logger = logging.getLogger(__name__)
 
 
 class ProductsController(http.Controller):
+    def _get_coordinates(self, partner_ids):
+        """Mapeia partner_id -> (latitude, longitude) com um único read."""
+        partners = request.env["res.partner"].sudo().browse(partner_ids)
+        return {
+            row["id"]: (row["partner_latitude"] or 0, row["partner_longitude"] or 0)
+            for row in partners.read(["partner_latitude", "partner_longitude"])
+        }
+
+    def _get_sizes_by_company(self, company_ids):
+        """Agrupa as categorias filhas (com pai) por company e nome do pai.
+
+        Busca as categorias de todas as companies da página de uma vez e lê
+        os nomes dos pais em um único read, em vez de uma busca por company
+        seguida do acesso a ``parent_id.name`` categoria a categoria.
+        """
+        Category = request.env["product.category"].sudo()
+        categories = Category.search_read(
+            [("which_company_ids", "in", company_ids), ("parent_id", "!=", False)],
+            ["name", "parent_id", "which_company_ids"],
+            load=None,
+        )
+        parent_names = {
+            row["id"]: row["name"]
+            for row in Category.browse(list({cat["parent_id"] for cat in categories})).read(["name"])
+        }
+        page_companies = set(company_ids)
+        sizes_by_company = {}
+        for cat in categories:
+            parent_name = parent_names.get(cat["parent_id"])
+            for company_id in cat["which_company_ids"]:
+                if company_id in page_companies:
+                    sizes = sizes_by_company.setdefault(company_id, {})
+                    sizes.setdefault(parent_name, []).append(cat["name"])
+        return sizes_by_company
+
     @http.route("/api/products/", type="http", auth="none", methods=["GET"], csrf=False)
+    @instrument_queries
+    @token_required
     def get_products(self):
-        # Validação do token via header "Authorization"
-        auth_header = request.httprequest.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return request.make_response(
-                json.dumps({"error": "Token não fornecido no header de autorização"}),
-                status=401,
-                headers=[("Content-Type", "application/json")],
-            )
-        token = auth_header.split(" ")[1].strip()
-        try:
-            # Verifica o token utilizando o modelo de autenticação
-            request.env["auth.model"].sudo().verify_token(token)
-        except Exception as e:
-            _logger.exception("Token inválido: %s", e)
-            return request.make_response(
-                json.dumps({"error": "Token inválido"}),
-                status=401,
-                headers=[("Content-Type", "application/json")],
-            )
-
         # Parâmetros de paginação (opcional)
         page = int(request.params.get("page", 1))
         limit = int(request.params.get("limit", 100))
         offset = (page - 1) * limit
 
+        # Dados de referência: valida pelo fingerprint das companies, das
+        # categorias e dos parceiros das companies (coordenadas) antes de ler
+        etag = reference_etag(
+            [
+                table_fingerprint(request.env["res.company"].sudo()),
+                table_fingerprint(request.env["product.category"].sudo()),
+                table_fingerprint(
+                    request.env["res.partner"].sudo(), [("ref_company_ids", "!=", False)]
+                ),
+            ],
+            page, limit,
+        )
+        if etag_matches(etag):
+            return not_modified_response(etag)
+
         # Busca apenas os campos necessários do modelo res.company
         companies = (
             request.env["res.company"]
@@ -47,24 +87,26 @@ class ProductsController(http.Controller):
             )
         )
 
+        # Coordenadas e tamanhos de todas as companies da página, em lote
+        coordinates = self._get_coordinates(
+            [comp["partner_id"][0] for comp in companies if comp.get("partner_id")]
+        )
+        sizes_by_company = self._get_sizes_by_company([comp["id"] for comp in companies])
+
         json_return = []
+        pending_geocoding = []
         for comp in companies:
             partner_field = comp.get("partner_id")
             lat = None
             lon = None
             if partner_field:
                 partner_id = partner_field[0]
-                partner = request.env["res.partner"].sudo().browse(partner_id)
                 # Supomos que o modelo res.partner possui os campos partner_latitude e partner_longitude
-                lat = partner.partner_latitude or 0
-                lon = partner.partner_longitude or 0
-                # Se as coordenadas estiverem zeradas, executa o cálculo (atenção: pode ser processamento pesado)
+                lat, lon = coordinates.get(partner_id, (0, 0))
+                # Coordenadas zeradas: o cálculo é enfileirado para o cron de
+                # geolocalização e a resposta segue com o que está gravado
                 if lat == 0 and lon == 0:
-                    request.env["products.model"].calculate_coordinates(partner_id)
-                    # Invalida o cache para forçar a nova leitura
-                    # partner.invalidate_cache()
-                    lat = partner.partner_latitude or 0
-                    lon = partner.partner_longitude or 0
+                    pending_geocoding.append(partner_id)
 
             # Monta o endereço com os campos disponíveis
             state_name = comp.get("state_id")[1] if comp.get("state_id") else ""
@@ -73,24 +115,6 @@ class ProductsController(http.Controller):
                 + f" - {comp.get('city')}/{state_name}"
             )
 
-            # Busca as categorias de produtos que são filhos de uma categoria pai
-            children_size = (
-                request.env["product.category"]
-                .sudo()
-                .search(
-                    [
-                        ("which_company_ids", "=", comp.get("id")),
-                        ("parent_id", "!=", False),
-                    ]
-                )
-            )
-
-            # Agrupa os nomes das categorias por nome do parceiro pai
-            sizes_by_parent = {}
-            for cat in children_size:
-                partner_name = cat.parent_id.name
-                sizes_by_parent.setdefault(partner_name, []).append(cat.name)
-
             data = {
                 "id": comp.get("id"),
                 "cnpj": None,
@@ -102,10 +126,11 @@ class ProductsController(http.Controller):
                 "long": lon if lon else None,
                 "sap": None,
                 "started_when": None,
-                "available_sizes": sizes_by_parent,
+                "available_sizes": sizes_by_company.get(comp["id"], {}),
             }
             json_return.append(data)
 
-        return request.make_response(
-            json.dumps(json_return), headers=[("Content-Type", "application/json")]
-        )
+        if pending_geocoding:
+            request.env["products.model"].sudo().enqueue_geocoding(pending_geocoding)
+
+        return json_response(json_return, headers=[('ETag', etag)])
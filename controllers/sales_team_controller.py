@@ -1,32 +1,57 @@
 from odoo import http
 from odoo.http import request, Response, Controller
-import json
 import logging
 
+from ..utils.http_utils import (
+    etag_matches,
+    json_response,
+    not_modified_response,
+    reference_etag,
+    table_fingerprint,
+)
+from ..utils.pagination import count_records, offset_search, parse_count_mode
+from ..utils.query_stats import instrument_queries
+from .auth_controller import token_required
+
 _logger = logging.getLogger(__name__)
 
 class SalesTeamExportController(http.Controller):
+    def _get_brokers_by_team(self, team_ids):
+        """Monta os corretores (usuários membros) de cada equipe da página.
+
+        Equivale a percorrer ``team.member_ids`` equipe a equipe, mas com uma
+        consulta para os vínculos ativos (crm.team.member) de todas as equipes
+        e um único read de nome/email dos usuários, qualquer que seja o
+        número de equipes ou de membros.
+        """
+        memberships = request.env['crm.team.member'].sudo().search_read(
+            [('crm_team_id', 'in', team_ids)], ['crm_team_id', 'user_id'], load=None
+        )
+        users = {
+            user['id']: user
+            for user in request.env['res.users'].sudo().browse(
+                list({m['user_id'] for m in memberships if m['user_id']})
+            ).read(['name', 'email'])
+        }
+        brokers_by_team = {}
+        seen = set()
+        for membership in memberships:
+            key = (membership['crm_team_id'], membership['user_id'])
+            if not membership['user_id'] or key in seen:
+                continue
+            seen.add(key)
+            user = users[membership['user_id']]
+            brokers_by_team.setdefault(membership['crm_team_id'], []).append({
+                "id": user['id'],
+                "name": user['name'],
+                "email": user['email'] or ""
+            })
+        return brokers_by_team
+
     @http.route('/api/sales-teams/', type='http', auth='none', methods=['GET'], csrf=False)
+    @instrument_queries
+    @token_required
     def get_sales_teams(self):
-        # Validação do token via header "Authorization"
-        auth_header = request.httprequest.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return request.make_response(
-                json.dumps({"error": "Token não fornecido no header de autorização"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-        token = auth_header.split(' ')[1].strip()
-        try:
-            request.env['auth.model'].sudo().verify_token(token)
-        except Exception as e:
-            _logger.exception("Token inválido: %s", e)
-            return request.make_response(
-                json.dumps({"error": "Token inválido"}),
-                status=401,
-                headers=[('Content-Type', 'application/json')]
-            )
-
         # Obtenção e validação dos parâmetros de paginação
         page = request.params.get('page', 1)
         page_size = request.params.get('page_size', 100)
@@ -34,36 +59,45 @@ class SalesTeamExportController(http.Controller):
             page = int(page)
             page_size = int(page_size)
         except ValueError:
-            return request.make_response(
-                json.dumps({"error": "Os parâmetros 'page' e 'page_size' devem ser números inteiros."}),
-                status=400,
-                headers=[('Content-Type', 'application/json')]
+            return json_response(
+                {"error": "Os parâmetros 'page' e 'page_size' devem ser números inteiros."},
+                status=400
             )
+        try:
+            count_mode = parse_count_mode(request.params.get('count'))
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
         offset = (page - 1) * page_size
 
+        # Dados de referência: valida pelo fingerprint das equipes, dos
+        # vínculos de membros e dos usuários (nome e email vêm do parceiro)
+        etag = reference_etag(
+            [
+                table_fingerprint(request.env['crm.team'].sudo()),
+                table_fingerprint(request.env['crm.team.member'].sudo()),
+                table_fingerprint(request.env['res.users'].sudo()),
+                table_fingerprint(request.env['res.partner'].sudo(), [('user_ids', '!=', False)]),
+            ],
+            page, page_size, count_mode,
+        )
+        if etag_matches(etag):
+            return not_modified_response(etag)
+
         # Busca as equipes de vendas com paginação
-        sales_teams = request.env['crm.team'].sudo().search([], offset=offset, limit=page_size)
-        total_count = request.env['crm.team'].sudo().search_count([])
+        sales_teams, has_next = offset_search(request.env['crm.team'].sudo(), [], offset, page_size)
+        total_count = count_records(request.env['crm.team'].sudo(), [], count_mode)
+
+        brokers_by_team = self._get_brokers_by_team(sales_teams.ids)
 
         result = []
         for team in sales_teams:
             team_data = {
                 "id": team.id,
                 "name": team.name,
-                "brokers": []
+                "brokers": brokers_by_team.get(team.id, [])
             }
-            # Itera sobre os usuários (corretores) da equipe
-            for user in team.member_ids:
-                broker_data = {
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email or ""
-                }
-                team_data["brokers"].append(broker_data)
-
             result.append(team_data)
 
-        has_next = offset + page_size < total_count
         response_data = {
             "data": result,
             "page": page,
@@ -72,7 +106,4 @@ class SalesTeamExportController(http.Controller):
             "has_next": has_next
         }
 
-        return request.make_response(
-            json.dumps(response_data, ensure_ascii=False),
-            headers=[('Content-Type', 'application/json')]
-        )
+        return json_response(response_data, headers=[('ETag', etag)])
@@ -1,208 +1,134 @@
 from odoo import http
 from odoo.http import request, Response, Controller
 from werkzeug.exceptions import BadRequest
-from datetime import datetime, time
-import json
-import re
 import logging
-import pytz
 
-from ..utils.date_utils import parse_date
+from ..services.export_domains import build_lead_domain
+from ..services.visit_export_service import VisitExportService
+from ..utils.arrow_utils import ARROW_UNAVAILABLE, arrow_response, pa
+from ..utils.change_feed import read_changes
+from ..utils.http_utils import json_response
+from ..utils.pagination import (
+    count_records,
+    decode_cursor,
+    keyset_search,
+    offset_search,
+    parse_count_mode,
+)
+from ..utils.query_stats import instrument_queries
+from ..utils.streaming import ndjson_response
+from .auth_controller import token_required
 
 _logger = logging.getLogger(__name__)
 
 
 class VisitsController(Controller):
     @http.route("/api/visits/", type="http", auth="none", methods=["GET"], csrf=False)
+    @instrument_queries
+    @token_required
     def get_visits(self):
-        # Validação do token via header "Authorization"
-        auth_header = request.httprequest.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return request.make_response(
-                json.dumps({"error": "Token não fornecido no header de autorização"}),
-                status=401,
-                headers=[("Content-Type", "application/json")],
-            )
-        token = auth_header.split(" ")[1].strip()
+        # Montagem do domain (datas e company_id)
         try:
-            request.env["auth.model"].sudo().verify_token(token)
-        except Exception as e:
-            _logger.exception("Token inválido: %s", e)
-            return request.make_response(
-                json.dumps({"error": "Token inválido"}),
-                status=401,
-                headers=[("Content-Type", "application/json")],
-            )
-
-        # Montagem do domain
-        domain = []
-        company_id_param = request.params.get("company_id")
-        start_date_str = request.params.get("start_date")
-        end_date_str = request.params.get("end_date")
-
-        # Filtro por data
-        if start_date_str and end_date_str:
+            domain = build_lead_domain(request.params)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
+
+        # changed_since: feed incremental por (write_date, id), incluindo leads
+        # arquivadas (deleted=True) e os ids excluídos desde o watermark
+        changed_since = request.params.get("changed_since")
+        if changed_since:
             try:
-                start_dt = parse_date(start_date_str)
-                end_dt = parse_date(end_date_str)
-
-                local_tz = pytz.timezone("America/Sao_Paulo")
-                start_dt = local_tz.localize(datetime.combine(start_dt, time.min))
-                end_dt = local_tz.localize(datetime.combine(end_dt, time.max))
-
-                start_utc = start_dt.astimezone(pytz.utc)
-                end_utc = end_dt.astimezone(pytz.utc)
-
-                domain.append(("create_date", ">=", start_utc))
-                domain.append(("create_date", "<=", end_utc))
-
-                _logger.info("Domínio após filtro de datas: %s", domain)
-
-            except Exception as e:
-                _logger.exception("Erro ao converter datas: %s", e)
-                return request.make_response(
-                    json.dumps(
-                        {
-                            "error": "Erro ao converter as datas. Use um dos formatos: YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS ou DD/MM/YYYY."
-                        }
-                    ),
-                    status=400,
-                    headers=[("Content-Type", "application/json")],
+                page_size = int(request.params.get("page_size", 100))
+                leads, deleted_ids, next_changed_since, has_next = read_changes(
+                    request.env["crm.lead"].sudo(), domain, changed_since, page_size
                 )
-
-        # Filtro por company_id
-        if company_id_param:
+            except ValueError as e:
+                raise BadRequest(str(e))
+            return json_response({
+                "data": VisitExportService(request.env).serialize(leads),
+                "deleted_ids": deleted_ids,
+                "changed_since": changed_since,
+                "next_changed_since": next_changed_since,
+                "page_size": page_size,
+                "has_next": has_next,
+            })
+
+        cursor = request.params.get("cursor")
+
+        # format=ndjson|arrow: exporta todo o filtro em lotes, sem paginação
+        # ('cursor' opcional retoma após o último id recebido). ndjson traz uma
+        # visita por linha; arrow, um record batch colunar por lote.
+        export_format = request.params.get("format")
+        if export_format in ("ndjson", "arrow"):
             try:
-                company_id = int(company_id_param)
-                domain.append(("company_id", "=", company_id))
-            except ValueError:
-                return request.make_response(
-                    json.dumps(
-                        {
-                            "error": "O parâmetro 'company_id' deve ser um número inteiro."
-                        }
-                    ),
-                    status=400,
-                    headers=[("Content-Type", "application/json")],
+                after_id = decode_cursor(cursor)
+            except ValueError as e:
+                raise BadRequest(str(e))
+            if export_format == "ndjson":
+                return ndjson_response(
+                    request.env, "crm.lead", domain,
+                    lambda env, leads: VisitExportService(env).serialize(leads),
+                    after_id=after_id,
                 )
+            if pa is None:
+                return json_response({"error": ARROW_UNAVAILABLE}, status=501)
+            return arrow_response(
+                request.env, "crm.lead", domain, VisitExportService.arrow_schema(),
+                lambda env, leads: VisitExportService(env).serialize_columns(leads),
+                after_id=after_id,
+            )
 
-        # Paginação
+        # Paginação: por página (offset) ou por cursor (keyset)
         page = request.params.get("page")
         page_size = request.params.get("page_size")
-        if not page or not page_size:
+        if not page_size or (cursor is None and not page):
             raise BadRequest(
-                "Os parâmetros 'page' e 'page_size' são obrigatórios na URL."
+                "Os parâmetros 'page' e 'page_size' (ou 'cursor' e 'page_size') são obrigatórios na URL."
             )
         try:
-            page = int(page)
+            page = int(page) if cursor is None else None
             page_size = int(page_size)
         except ValueError:
             raise BadRequest(
                 "Os parâmetros 'page' e 'page_size' devem ser números inteiros."
             )
+        try:
+            count_mode = parse_count_mode(request.params.get("count"))
+        except ValueError as e:
+            raise BadRequest(str(e))
+
+        Lead = request.env["crm.lead"].sudo()
+        if cursor is None:
+            offset = (page - 1) * page_size
+            # Busca paginada usando o domain
+            leads, has_next = offset_search(Lead, domain, offset, page_size)
+        else:
+            try:
+                leads, next_cursor = keyset_search(Lead, domain, cursor, page_size)
+            except ValueError as e:
+                raise BadRequest(str(e))
 
-        offset = (page - 1) * page_size
-
-        # Busca paginada usando o domain
-        leads = (
-            request.env["crm.lead"]
-            .sudo()
-            .search(domain, offset=offset, limit=page_size)
-        )
-
-        json_return = []
-        for lead in leads:
-            team_member = (
-                request.env["crm.team.member"]
-                .sudo()
-                .search([("email", "=", lead.user_id.login)], limit=1)
-            )
-
-            # 1) filtra só as categorias “folha” (sem filhos)
-            children_size = lead.product_category_ids.filtered(lambda c: not c.child_id)
-
-            # 2) agrupa por parent → [filhos]
-            sizes_by_parent = {}
-            for cat in children_size:
-                parent_name = cat.parent_id.name or "Sem categoria pai"
-                sizes_by_parent.setdefault(parent_name, []).append(cat.name)
-
-            # Lógica de main_media_id conforme seu case
-            main_media_id = None
-            if lead.company_id.selection_base.id == 1:
-                for integra in lead.company_id.vendas_ids:
-                    if not lead.chanel_1:
-                        main_media_id = None
-                        break
-                    if lead.team_id == integra.team_id:
-                        media_column = integra.stand_id.media_column
-                        midia_nome = re.sub(r"\s*\d+$", "", lead.chanel_1.name.strip())
-                        columns_map = {
-                            "one": "cod_midia1",
-                            "two": "cod_midia2",
-                            "three": "cod_midia3",
-                            "four": "cod_midia4",
-                            "five": "cod_midia5",
-                            "six": "cod_midia6",
-                        }
-                        column_name = columns_map.get(media_column)
-                        if not column_name:
-                            main_media_id = None
-                            break
-                        for midia in lead.company_id.midia_ids:
-                            if midia.nome_midia == midia_nome:
-                                main_media_id = getattr(midia, column_name, None)
-                                break
-                        break
-
-            data = {
-                "id": lead.id,
-                "third_party_id": lead.partner_id.third_party_id or None,
-                "broker_name": " - ".join(
-                    filter(None, [lead.user_id.name, team_member.sales_name])
-                ),
-                "manager_name": team_member.crm_team_id.user_id.name,
-                "superintendent_name": None,
-                "indication_broker_name": lead.sales_indicao_id.name if lead.sales_indicao_id.name and lead.type_of_visit2 == 'Indicação corretor' else None,
-                "sales_company_id": lead.team_id.id,
-                "product_id": lead.company_id.id,
-                "customer_id": lead.partner_id.id,
-                "type_of": {
-                    "name": lead.type_of_visit,
-                    "sub_type_of": lead.type_of_visit2 or None
-                },
-                "out_of_service": lead.fora_do_expediente,
-                "created": lead.create_date.isoformat() if lead.create_date else None,
-                "justify_id": None,
-                "owner": None,
-                "created_by": lead.creator_user_id.id,
-                "changed_by": lead.last_editor_id.id,
-                "changed_when": (
-                    lead.write_date.isoformat() if lead.write_date else None
-                ),
-                "main_media_id": main_media_id,
-                "deleted": not lead.active,
-                "corretor_account_id_crm": None,
-                "recebido_crm": False,
-                "broker_email": lead.user_id.login,
-                "product_type_id": None,
-                "visit_size": sizes_by_parent,
-            }
-            json_return.append(data)
+        # Serialização colunar: consultas por página independem do page_size
+        json_return = VisitExportService(request.env).serialize(leads)
 
         # Total filtrado para paginação
-        total_count = request.env["crm.lead"].sudo().search_count(domain)
-        has_next = offset + page_size < total_count
+        total_count = count_records(Lead, domain, count_mode)
+        if cursor is None:
+            response_data = {
+                "data": json_return,
+                "page": page,
+                "page_size": page_size,
+                "has_next": has_next,
+                "total_count": total_count,
+            }
+        else:
+            response_data = {
+                "data": json_return,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "page_size": page_size,
+                "has_next": next_cursor is not None,
+                "total_count": total_count,
+            }
 
-        return request.make_response(
-            json.dumps(
-                {
-                    "data": json_return,
-                    "page": page,
-                    "page_size": page_size,
-                    "has_next": has_next,
-                    "total_count": total_count,
-                }
-            ),
-            headers=[("Content-Type", "application/json")],
-        )
+        return json_response(response_data)
@@ -1,2 +1,6 @@
 from . import auth_model
-from . import products_model
\ No newline at end of file
+from . import products_model
+from . import crm_lead
+from . import export_tombstone
+from . import res_partner
+from . import export_job
\ No newline at end of file
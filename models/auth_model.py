@@ -1,14 +1,38 @@
-from odoo import models, fields, api, exceptions
+from odoo import models, fields, api, exceptions, tools
+from collections import namedtuple
 import secrets
 import string
 import jwt
 import datetime
+import hashlib
 import pytz
-from odoo.tools import lazy_property
 import logging
 
+from ..utils.cache_utils import TTLCache
+
 _logger = logging.getLogger(__name__)
 
+# Caches de tokens já verificados, locais ao processo (worker), um por banco:
+# um token validado com o secret de um banco não vale em outro banco servido
+# pelo mesmo processo. A chave é o digest do token, nunca o token em si, e
+# cada entrada expira junto com o claim 'exp' do JWT.
+_token_caches = {}
+
+
+# Snapshot imutável da configuração JWT, compartilhado pelo ormcache do registry
+JwtConfig = namedtuple('JwtConfig', ['id', 'secret_key', 'algorithm', 'expiration_hours'])
+
+
+def _get_token_cache(dbname):
+    token_cache = _token_caches.get(dbname)
+    if token_cache is None:
+        token_cache = _token_caches.setdefault(dbname, TTLCache(maxsize=2048, ttl=300))
+    return token_cache
+
+
+def _token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def generate_random_secret_key():
     alphabet = string.ascii_letters + string.digits + "-_."
     return ''.join(secrets.choice(alphabet) for _ in range(24))
@@ -33,15 +57,44 @@ class AuthModel(models.Model):
     allow_refresh_tokens = fields.Boolean(string="Allow Refresh Tokens", default=True)
     refresh_token_expiry = fields.Integer(string="Refresh Token Expiry (Days)", default=30)
 
-    @lazy_property
-    def _token_cache(self):
-        return {}  # Em produção, use um cache distribuído
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Invalida o snapshot em todos os workers (sinalização do registry)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_jwt_config(self):
+        # Executado apenas quando o ormcache está vazio, ou seja, na primeira
+        # chamada do worker ou após uma invalidação: os tokens verificados com
+        # a configuração anterior deixam de valer.
+        _get_token_cache(self.env.cr.dbname).clear()
+        config = self.sudo().search([], limit=1)
+        if not config:
+            return None
+        return JwtConfig(config.id, config.secret_key, config.algorithm, config.expiration_hours)
 
     def invalidate_user_tokens(self, user_id):
-        # Reinicializa o cache sobrescrevendo a propriedade lazy
-        self.__dict__['_token_cache'] = {}
+        # Descarta do cache os tokens já verificados deste usuário
+        _get_token_cache(self.env.cr.dbname).discard_if(lambda payload: payload.get('user_id') == user_id)
         self.env['auth.refresh.token'].search([('user_id', '=', user_id)]).unlink()
 
+    @api.model
+    def token_cache_stats(self):
+        return _get_token_cache(self.env.cr.dbname).stats()
+
 
     def rotate_secret_key(self):
         self.ensure_one()
@@ -49,27 +102,42 @@ class AuthModel(models.Model):
             'secret_key': generate_random_secret_key(),
             'last_rotation_date': fields.Datetime.now()
         })
+        _get_token_cache(self.env.cr.dbname).clear()
         _logger.info("Chave JWT rotacionada")
 
+    @api.model
     def generate_token(self, user_id):
-        exp_utc = datetime.datetime.utcnow() + datetime.timedelta(hours=self.expiration_hours)
+        config = self._get_jwt_config()
+        if not config:
+            raise exceptions.ValidationError('JWT configuration not found')
+        exp_utc = datetime.datetime.utcnow() + datetime.timedelta(hours=config.expiration_hours)
         payload = {
             'user_id': user_id,
             'exp': exp_utc,
             'iat': datetime.datetime.utcnow()
         }
-        token = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+        token = jwt.encode(payload, config.secret_key, algorithm=config.algorithm)
         sao_paulo_tz = pytz.timezone('America/Sao_Paulo')
         exp_local = exp_utc.replace(tzinfo=pytz.utc).astimezone(sao_paulo_tz)
         return token, exp_local
 
+    @api.model
     def verify_token(self, token):
+        # O snapshot precisa ser consultado antes do cache de tokens: se a
+        # configuração foi alterada em outro worker, é aqui que o cache é limpo.
+        config = self._get_jwt_config()
+        if not config:
+            raise exceptions.ValidationError('JWT configuration not found')
+        token_cache = _get_token_cache(self.env.cr.dbname)
+        digest = _token_digest(token)
+        payload = token_cache.get(digest)
+        if payload is not None:
+            return dict(payload)
         try:
-            config = self.search([], limit=1)
-            if not config:
-                raise exceptions.ValidationError('JWT configuration not found')
-            return jwt.decode(token, config.secret_key, algorithms=[config.algorithm])
+            payload = jwt.decode(token, config.secret_key, algorithms=[config.algorithm])
         except jwt.ExpiredSignatureError:
             raise exceptions.ValidationError('Token expirado')
         except jwt.InvalidTokenError:
             raise exceptions.ValidationError('Token inválido')
+        token_cache.set(digest, payload, expires_at=payload.get('exp'))
+        return dict(payload)
@@ -0,0 +1,115 @@
+from odoo import models, fields, api, tools
+
+from ..services.survey_export_service import compile_survey_schema
+from ..utils.http_utils import compute_etag
+
+# Lista distinta de interesses por banco, neste worker: (resumo, nomes, etag)
+_interest_snapshots = {}
+
+
+class CrmLead(models.Model):
+    _inherit = 'crm.lead'
+
+    def init(self):
+        # Índice do feed incremental (changed_since), ordenado por (write_date, id)
+        tools.create_index(self._cr, 'crm_lead_write_date_id_index', self._table, ['write_date', 'id'])
+
+    @api.model
+    @tools.ormcache('self.env.lang')
+    def _get_survey_export_schema(self):
+        # Compilado uma vez por worker e idioma; o ormcache é descartado a
+        # cada recarga do registry (instalação/atualização de módulos).
+        return compile_survey_schema(self)
+
+    def _interest_names(self):
+        # Mesma base do antigo read_group([], ['interest']): só leads ativas
+        return {lead.interest for lead in self if lead.active and lead.interest}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leads = super().create(vals_list)
+        self.env['crm.lead.interest']._register_names(leads._interest_names())
+        return leads
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'interest' in vals or 'active' in vals:
+            self.env['crm.lead.interest']._register_names(self._interest_names())
+        return res
+
+    def unlink(self):
+        # Interesses que ficarem sem leads são removidos pelo cron diário
+        ids = self.ids
+        res = super().unlink()
+        self.env['export.tombstone']._record_deleted(self._name, ids)
+        return res
+
+
+class CrmLeadInterest(models.Model):
+    _name = 'crm.lead.interest'
+    _description = 'Distinct lead interests (materialized)'
+    _order = 'name'
+
+    name = fields.Char(string='Interest', required=True)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)', 'Interest must be unique.'),
+    ]
+
+    @api.model
+    def _register_names(self, names):
+        """Inclui os interesses ainda não conhecidos, vindos dos hooks do crm.lead.
+
+        ``ON CONFLICT DO NOTHING`` não trava a linha de um interesse que já
+        existe, então gravações concorrentes de leads não esperam umas pelas
+        outras; os nomes vão ordenados para que dois lotes com interesses
+        novos em comum nunca se bloqueiem em ordens opostas (deadlock).
+        """
+        if not names:
+            return
+        self.env.cr.execute("""
+            INSERT INTO crm_lead_interest (name, create_date, write_date)
+            SELECT name, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM unnest(%s) AS name
+             ORDER BY name
+            ON CONFLICT (name) DO NOTHING
+        """, (sorted(names),))
+
+    @api.model
+    def _refresh_names(self):
+        # Sincronização completa (instalação e cron diário): remove os
+        # interesses sem leads ativas e inclui os que faltarem
+        self.env['crm.lead'].flush_model(['interest', 'active'])
+        self.env.cr.execute("""
+            DELETE FROM crm_lead_interest i
+             WHERE NOT EXISTS (
+                SELECT 1 FROM crm_lead l WHERE l.active AND l.interest = i.name
+             )
+        """)
+        self.env.cr.execute("""
+            INSERT INTO crm_lead_interest (name, create_date, write_date)
+            SELECT DISTINCT interest, now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM crm_lead
+             WHERE active AND interest IS NOT NULL AND interest != ''
+             ORDER BY interest
+            ON CONFLICT (name) DO NOTHING
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def _get_interest_names(self):
+        """Retorna ``(nomes, etag)`` da lista distinta de interesses.
+
+        A lista fica em memória por worker e só é relida quando o resumo
+        (total, maior id) da tabela muda: inclusões aumentam o maior id e as
+        remoções do cron reduzem o total. Nenhum outro cache é invalidado.
+        """
+        self.env.cr.execute("SELECT count(*), max(id) FROM crm_lead_interest")
+        fingerprint = self.env.cr.fetchone()
+        snapshot = _interest_snapshots.get(self.env.cr.dbname)
+        if snapshot is None or snapshot[0] != fingerprint:
+            self.env.cr.execute("SELECT name FROM crm_lead_interest ORDER BY name")
+            names = tuple(row[0] for row in self.env.cr.fetchall())
+            snapshot = (fingerprint, names, compute_etag(names))
+            _interest_snapshots[self.env.cr.dbname] = snapshot
+        return snapshot[1], snapshot[2]
@@ -0,0 +1,180 @@
+from odoo import models, fields, api
+from odoo.tools import config
+from datetime import timedelta
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+
+from ..services.client_export_service import ClientExportService
+from ..services.export_domains import build_client_domain, build_lead_domain
+from ..services.survey_export_service import SurveyExportService
+from ..services.visit_export_service import VisitExportService
+from ..utils.json_utils import dumps
+from ..utils.streaming import iter_batches
+
+_logger = logging.getLogger(__name__)
+
+# endpoint -> (modelo, montagem do domain a partir dos filtros, serializador)
+EXPORT_ENDPOINTS = {
+    'visits': ('crm.lead', build_lead_domain, VisitExportService),
+    'survey': ('crm.lead', build_lead_domain, SurveyExportService),
+    'clients': ('res.partner', build_client_domain, ClientExportService),
+}
+# Registros lidos, serializados e gravados por vez
+EXPORT_BATCH_SIZE = 1000
+# Jobs em execução há mais tempo que isso voltam para a fila (worker reiniciado)
+EXPORT_STALE_HOURS = 2
+# Dias que os arquivos gerados ficam disponíveis para download
+EXPORT_RETENTION_DAYS = 7
+
+
+def _csv_value(value):
+    # Valores aninhados (type_of, visit_size, perguntas) vão como JSON na célula
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class ExportJob(models.Model):
+    _name = 'export.job'
+    _description = 'Asynchronous bulk export job'
+    _order = 'id desc'
+
+    endpoint = fields.Selection([
+        ('visits', 'Visits'),
+        ('survey', 'Survey Responses'),
+        ('clients', 'Clients'),
+    ], string='Endpoint', required=True)
+    filters = fields.Text(string='Filters (JSON)', default='{}')
+    file_format = fields.Selection([
+        ('ndjson', 'NDJSON'),
+        ('csv', 'CSV'),
+    ], string='Format', default='ndjson', required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, index=True)
+    user_id = fields.Many2one('res.users', string='Requested By', index=True, ondelete='cascade')
+    file_path = fields.Char(string='File Path')
+    file_size = fields.Integer(string='File Size')
+    record_count = fields.Integer(string='Records', default=0)
+    error = fields.Text(string='Error')
+    started_at = fields.Datetime(string='Started At')
+    finished_at = fields.Datetime(string='Finished At')
+
+    @api.model
+    def _jobs_dir(self):
+        path = os.path.join(config.filestore(self.env.cr.dbname), 'odoo_export_api', 'jobs')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @api.model
+    def _build_domain(self, endpoint, filters):
+        """Valida endpoint e filtros; levanta ValueError com a mensagem da API."""
+        if endpoint not in EXPORT_ENDPOINTS:
+            raise ValueError(
+                "O campo 'endpoint' deve ser um dos valores: %s." % ", ".join(EXPORT_ENDPOINTS)
+            )
+        if not isinstance(filters, dict):
+            raise ValueError("O campo 'filters' deve ser um objeto JSON.")
+        return EXPORT_ENDPOINTS[endpoint][1](filters)
+
+    def _to_api(self):
+        self.ensure_one()
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "format": self.file_format,
+            "filters": json.loads(self.filters or '{}'),
+            "state": self.state,
+            "record_count": self.record_count,
+            "file_size": self.file_size or None,
+            "error": self.error or None,
+            "created": self.create_date,
+            "started_at": self.started_at or None,
+            "finished_at": self.finished_at or None,
+            "download_url": f"/api/export/jobs/{self.id}/download" if self.state == 'done' else None,
+        }
+
+    def _run(self):
+        """Gera o arquivo gzip do job em lotes, com memória limitada a um lote.
+
+        O arquivo é escrito como ``.part`` e renomeado ao final, de modo que um
+        download nunca vê um arquivo incompleto.
+        """
+        self.ensure_one()
+        model_name, _build, service_class = EXPORT_ENDPOINTS[self.endpoint]
+        domain = self._build_domain(self.endpoint, json.loads(self.filters or '{}'))
+        path = os.path.join(self._jobs_dir(), f'export_{self.id}_{self.endpoint}.{self.file_format}.gz')
+        tmp_path = path + '.part'
+
+        try:
+            count = 0
+            with gzip.open(tmp_path, 'wb') as gz:
+                text = io.TextIOWrapper(gz, encoding='utf-8', newline='') if self.file_format == 'csv' else None
+                writer = None
+                for records in iter_batches(self.env[model_name].sudo(), domain, batch_size=EXPORT_BATCH_SIZE):
+                    rows = service_class(self.env).serialize(records)
+                    if text is None:
+                        gz.write(b"".join(dumps(row) + b"\n" for row in rows))
+                    else:
+                        for row in rows:
+                            if writer is None:
+                                writer = csv.DictWriter(text, fieldnames=list(row), extrasaction='ignore')
+                                writer.writeheader()
+                            writer.writerow({key: _csv_value(value) for key, value in row.items()})
+                    count += len(rows)
+                if text is not None:
+                    text.flush()
+                    text.detach()
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        return path, count
+
+    @api.model
+    def _cron_process_jobs(self, limit=5):
+        stale = fields.Datetime.now() - timedelta(hours=EXPORT_STALE_HOURS)
+        self.sudo().search([('state', '=', 'running'), ('started_at', '<', stale)]).write({'state': 'pending'})
+        jobs = self.sudo().search([('state', '=', 'pending')], order='id', limit=limit)
+        for job in jobs:
+            job.write({'state': 'running', 'started_at': fields.Datetime.now()})
+            self.env.cr.commit()
+            try:
+                path, count = job._run()
+            except Exception as e:
+                _logger.exception("Falha no job de exportação %s", job.id)
+                self.env.cr.rollback()
+                job.write({'state': 'failed', 'error': str(e), 'finished_at': fields.Datetime.now()})
+            else:
+                job.write({
+                    'state': 'done',
+                    'file_path': path,
+                    'file_size': os.path.getsize(path),
+                    'record_count': count,
+                    'finished_at': fields.Datetime.now(),
+                })
+            # Cada job é confirmado individualmente para não perder progresso
+            self.env.cr.commit()
+
+    @api.autovacuum
+    def _gc_export_jobs(self):
+        limit = fields.Datetime.now() - timedelta(days=EXPORT_RETENTION_DAYS)
+        jobs = self.sudo().search([('create_date', '<', limit)])
+        for path in jobs.filtered('file_path').mapped('file_path'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        jobs.unlink()
@@ -0,0 +1,26 @@
+from odoo import models, fields, api
+from datetime import timedelta
+
+# Dias que as exclusões ficam disponíveis para o feed incremental
+TOMBSTONE_RETENTION_DAYS = 90
+
+
+class ExportTombstone(models.Model):
+    _name = 'export.tombstone'
+    _description = 'Deleted records reported by the export change feed'
+    _order = 'id'
+
+    model_name = fields.Char(string='Model', required=True, index=True)
+    res_id = fields.Integer(string='Record ID', required=True)
+
+    @api.model
+    def _record_deleted(self, model_name, ids):
+        """Registra a exclusão física de ``ids`` (chamado nos hooks de unlink)."""
+        if ids:
+            self.sudo().create([{'model_name': model_name, 'res_id': res_id} for res_id in ids])
+
+    @api.autovacuum
+    def _gc_tombstones(self):
+        limit = fields.Datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        self.sudo().search([('create_date', '<', limit)]).unlink()
+
@@ -1,32 +1,135 @@
 from odoo import models, fields, api, exceptions
+from datetime import timedelta
+import hashlib
 import logging
 
+from psycopg2 import IntegrityError
+
 _logger = logging.getLogger(__name__)
 
+# Tentativas antes de marcar o endereço como não localizável (cache negativo)
+GEOCODE_MAX_ATTEMPTS = 5
+# Espera antes da 1ª nova tentativa; dobra a cada falha (backoff exponencial)
+GEOCODE_RETRY_MINUTES = 15
+
+
+def _address_hash(partner):
+    address = '|'.join(str(part or '') for part in (
+        partner.street, partner.street2, partner.zip, partner.city,
+        partner.state_id.name, partner.country_id.name,
+    ))
+    return hashlib.sha1(address.encode()).hexdigest()
+
 
 class ProductsModel(models.Model):
     _name = 'products.model'
     _description = 'Product lat and long calculation'
 
+    def _geocode_partner(self, partner):
+        # Ponto de extensão do geocoder: retorna (lat, long) ou None.
+        # Testes podem sobrescrever este método com um geocoder local (stub).
+        street = (partner.street or '') + ' ' + (partner.street2 or '')
+        return partner._geo_localize(
+            street,
+            partner.zip,
+            partner.city,
+            partner.state_id.name,
+            partner.country_id.name
+        )
+
+    def _write_coordinates(self, partner, result):
+        partner.write({
+            'partner_latitude': result[0],
+            'partner_longitude': result[1],
+            'date_localization': fields.Date.context_today(partner)
+        })
+
     def calculate_coordinates(self, contact_id):
         partners = self.env['res.partner'].sudo().search([('id', '=', contact_id)], limit=1)
         for partner in partners:
-            street = (partner.street or '') + ' ' + (partner.street2 or '')
-            result = partner._geo_localize(
-                street,
-                partner.zip,
-                partner.city,
-                partner.state_id.name,
-                partner.country_id.name
-            )
-
+            result = self._geocode_partner(partner)
             if result:
-                partner.write({
-                    'partner_latitude': result[0],
-                    'partner_longitude': result[1],
-                    'date_localization': fields.Date.context_today(partner)
-                })
+                self._write_coordinates(partner, result)
             # else:
             #     partners_not_geo_localized |= partner
 
             # _logger.info(f"Id_company = {contact_id}, Street = {street or ''}, City = {partner.city or ''}, Zip = {partner.zip or ''}, Country = {partner.country_id.name or ''}")
+
+    @api.model
+    def enqueue_geocoding(self, partner_ids):
+        """Agenda a geolocalização dos parceiros para o cron, sem bloquear a requisição."""
+        Queue = self.env['products.geocode.queue'].sudo()
+        partners = self.env['res.partner'].sudo().browse(partner_ids)
+        queued = {item.partner_id.id: item for item in Queue.search([('partner_id', 'in', partners.ids)])}
+        vals_list = []
+        for partner in partners:
+            address_hash = _address_hash(partner)
+            item = queued.get(partner.id)
+            if not item:
+                vals_list.append({'partner_id': partner.id, 'address_hash': address_hash})
+            elif item.state == 'done' or (item.state == 'failed' and item.address_hash != address_hash):
+                # Endereços não localizáveis só voltam para a fila se mudarem
+                item.write({
+                    'state': 'pending',
+                    'attempts': 0,
+                    'next_attempt': False,
+                    'address_hash': address_hash,
+                })
+        if vals_list:
+            try:
+                with self.env.cr.savepoint():
+                    Queue.create(vals_list)
+            except IntegrityError:
+                # Outra requisição enfileirou os mesmos parceiros ao mesmo tempo
+                pass
+
+    @api.model
+    def _cron_process_geocoding(self, batch_size=50):
+        Queue = self.env['products.geocode.queue'].sudo()
+        now = fields.Datetime.now()
+        items = Queue.search([
+            ('state', '=', 'pending'),
+            '|', ('next_attempt', '=', False), ('next_attempt', '<=', now),
+        ], order='next_attempt asc nulls first, id', limit=batch_size)
+        for item in items:
+            partner = item.partner_id
+            error = False
+            try:
+                result = self._geocode_partner(partner)
+            except Exception as e:
+                _logger.warning("Falha ao geolocalizar o parceiro %s: %s", partner.id, e)
+                result, error = None, str(e)
+            if result:
+                self._write_coordinates(partner, result)
+                item.write({'state': 'done', 'attempts': item.attempts + 1, 'last_error': False})
+            else:
+                attempts = item.attempts + 1
+                vals = {'attempts': attempts, 'last_error': error or 'Endereço não localizado'}
+                if attempts >= GEOCODE_MAX_ATTEMPTS:
+                    vals['state'] = 'failed'
+                else:
+                    vals['next_attempt'] = now + timedelta(minutes=GEOCODE_RETRY_MINUTES * 2 ** (attempts - 1))
+                item.write(vals)
+            # Cada parceiro é confirmado individualmente para não perder progresso
+            self.env.cr.commit()
+
+
+class ProductsGeocodeQueue(models.Model):
+    _name = 'products.geocode.queue'
+    _description = 'Partner geocoding queue'
+    _order = 'next_attempt asc nulls first, id'
+
+    partner_id = fields.Many2one('res.partner', string='Partner', required=True, ondelete='cascade', index=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Not found'),
+    ], string='State', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Attempts', default=0)
+    next_attempt = fields.Datetime(string='Next Attempt')
+    last_error = fields.Char(string='Last Error')
+    address_hash = fields.Char(string='Address Hash')
+
+    _sql_constraints = [
+        ('partner_uniq', 'unique(partner_id)', 'Partner already queued for geocoding.'),
+    ]
@@ -0,0 +1,15 @@
+from odoo import models, tools
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def init(self):
+        # Índice do feed incremental (changed_since), ordenado por (write_date, id)
+        tools.create_index(self._cr, 'res_partner_write_date_id_index', self._table, ['write_date', 'id'])
+
+    def unlink(self):
+        ids = self.ids
+        res = super().unlink()
+        self.env['export.tombstone']._record_deleted(self._name, ids)
+        return res
@@ -1,15 +1,21 @@
+from odoo.addons.base.models.res_users import DEFAULT_CRYPT_CONTEXT
 from odoo.exceptions import ValidationError
-from datetime import datetime, timedelta
-from functools import lru_cache
-import time
+import secrets
+
+# Hash de referência usado para igualar o custo de um login inexistente ao de
+# uma senha incorreta, sem time.sleep. É calculado na importação do módulo
+# (início do worker), para que o primeiro login inexistente não pague também
+# o custo da geração do hash e se diferencie dos demais.
+_dummy_password_hash = DEFAULT_CRYPT_CONTEXT.hash(secrets.token_urlsafe(16))
+
 
 class AuthService:
     def __init__(self, env):
         self.env = env
 
-    @lru_cache(maxsize=1)
     def _get_jwt_config(self):
-        return self.env['auth.model'].sudo().search([], limit=1)
+        # Snapshot em ormcache: não consulta o banco em regime permanente
+        return self.env['auth.model'].sudo()._get_jwt_config()
 
     def authenticate_and_generate_token(self, login, password):
         uid = self._authenticate_user(login, password)
@@ -18,21 +24,24 @@ class AuthService:
         jwt_config = self._get_jwt_config()
         if not jwt_config:
             raise ValidationError("Configuração JWT ausente")
-        token, exp_time = jwt_config.generate_token(uid)
+        token, exp_time = self.env['auth.model'].sudo().generate_token(uid)
         return {
             'token': token,
             'expires_at': exp_time,
         }
 
     def _authenticate_user(self, login, password):
+        # Prevenção contra timing attacks: logins inexistentes também pagam
+        # uma verificação de hash, então o tempo de resposta não revela se o
+        # usuário existe, e o worker não fica parado segurando o cursor.
+        users = self.env['res.users'].sudo()
         try:
-            start = datetime.now()
-            uid = self.env['res.users'].sudo().authenticate(
-                self.env.cr.dbname, login, password, {}
-            )
-            elapsed = (datetime.now() - start).total_seconds()
-            time.sleep(max(0, 0.5 - elapsed))  # Prevenção contra timing attacks
-            return uid
+            if not users.search(users._get_login_domain(login), limit=1):
+                self._verify_dummy_password(password)
+                return None
+            return users.authenticate(self.env.cr.dbname, login, password, {})
         except Exception:
-            time.sleep(0.5)
             return None
+
+    def _verify_dummy_password(self, password):
+        DEFAULT_CRYPT_CONTEXT.verify(password, _dummy_password_hash)
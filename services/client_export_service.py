@@ -0,0 +1,48 @@
+PARTNER_FIELDS = [
+    "third_party_id", "name", "dob", "street", "street2", "building_number",
+    "city", "state_id", "zip", "email", "vat", "phone", "gender",
+    "write_date", "create_date", "active",
+]
+
+
+class ClientExportService:
+    """Serializa parceiros (res.partner) no formato do endpoint /api/clients/.
+
+    Lê as colunas da página com um único ``read`` e os nomes dos estados com
+    mais um, em vez de acessar ``state_id.name`` parceiro a parceiro.
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def serialize(self, partners):
+        rows = partners.sudo().read(PARTNER_FIELDS, load=None)
+        state_ids = list({row["state_id"] for row in rows if row["state_id"]})
+        states = {
+            state["id"]: state["name"]
+            for state in self.env["res.country.state"].sudo().browse(state_ids).read(["name"], load=None)
+        }
+
+        result = []
+        for row in rows:
+            result.append({
+                "id": row["id"],
+                "third_party_id": row["third_party_id"] or None,
+                "name": row["name"],
+                "birth_date": row["dob"] or None,
+                "address": " ".join(filter(None, [row["street"], row["street2"]])),
+                "address_number": row["building_number"],
+                "address_city": row["city"],
+                "address_state": states.get(row["state_id"]),
+                "address_zip_code": row["zip"],
+                "email": row["email"],
+                "cpf": row["vat"],
+                "cel": row["phone"],
+                "gender": row["gender"],
+                "changed_when": row["write_date"] or None,
+                "created": row["create_date"] or None,
+                "deleted": not row["active"],
+                "accept_info": True,
+                "corretor_account_id_crm": None,
+            })
+        return result
@@ -0,0 +1,73 @@
+from odoo.fields import Datetime
+from datetime import datetime, time
+import logging
+import pytz
+
+from ..utils.date_utils import parse_date
+
+_logger = logging.getLogger(__name__)
+
+DATE_FORMAT_ERROR = (
+    "Erro ao converter as datas. Use um dos formatos: "
+    "YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS ou DD/MM/YYYY."
+)
+
+
+def _local_day_bounds(start_date_str, end_date_str, end_time):
+    try:
+        start_date = parse_date(start_date_str)
+        end_date = parse_date(end_date_str)
+    except Exception as e:
+        _logger.exception("Erro ao converter datas: %s", e)
+        raise ValueError(DATE_FORMAT_ERROR)
+    local_tz = pytz.timezone("America/Sao_Paulo")
+    start_dt = local_tz.localize(datetime.combine(start_date, time.min))
+    end_dt = local_tz.localize(datetime.combine(end_date, end_time))
+    return start_dt.astimezone(pytz.utc), end_dt.astimezone(pytz.utc)
+
+
+def build_lead_domain(params):
+    """Domain de crm.lead a partir dos filtros de /api/visits/ e /api/survey/responses/.
+
+    ``params`` é um dict (``request.params`` ou os filtros de um export.job)
+    com ``start_date``/``end_date`` (dia local inteiro) e ``company_id``.
+    Levanta ValueError com a mensagem de erro da API.
+    """
+    domain = []
+    start_date_str = params.get("start_date")
+    end_date_str = params.get("end_date")
+    if start_date_str and end_date_str:
+        start_utc, end_utc = _local_day_bounds(start_date_str, end_date_str, time.max)
+        domain.append(("create_date", ">=", start_utc))
+        domain.append(("create_date", "<=", end_utc))
+        _logger.info("Domínio após filtro de datas: %s", domain)
+
+    company_id_param = params.get("company_id")
+    if company_id_param:
+        try:
+            domain.append(("company_id", "=", int(company_id_param)))
+        except ValueError:
+            raise ValueError("O parâmetro 'company_id' deve ser um número inteiro.")
+    return domain
+
+
+def build_client_domain(params):
+    """Domain de res.partner a partir dos filtros de /api/clients/."""
+    domain = []
+    start_date_str = params.get("start_date")
+    end_date_str = params.get("end_date")
+    if start_date_str and end_date_str:
+        # Fim do dia às 23:59:59, comparado como string que o Odoo entende
+        start_utc, end_utc = _local_day_bounds(start_date_str, end_date_str, time(23, 59, 59))
+        domain.append(("create_date", ">=", Datetime.to_string(start_utc)))
+        domain.append(("create_date", "<=", Datetime.to_string(end_utc)))
+        _logger.info("Filtro de datas aplicado: %s", domain)
+
+    # Filtros fixos: remove parceiros já ligados a usuários e sem is_company.
+    # 'user_ids = False' vira um anti-join (NOT IN subquery em res_users)
+    # no SQL, sem materializar a lista de parceiros dos usuários.
+    domain += [
+        ("user_ids", "=", False),
+        ("is_company", "=", False),
+    ]
+    return domain
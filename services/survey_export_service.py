@@ -0,0 +1,177 @@
+from ..utils.arrow_utils import pa
+
+# Lista de campos do crm.lead que fazem parte do survey
+'''Campos retirados:
+is_filhos
+monthly_income
+search_duration
+change_duration
+tamanho
+buscando
+incorporadora
+aqua
+falta
+interessado
+review1
+review2
+review4
+review5
+attention
+'''
+TEXT_FIELDS = [
+    "filhos", "children_living", "profession_list", "monthly_income_new", "age_limit",
+    "reason_for_property", "communicao_selection", "tamanho_new", "buscando_new",
+    "incorporadora_selection", "aqua_selection_new", "review1_new", "review3_new"
+]
+OPTIONS_FIELDS = [
+    "free_time", "buy_property_ids", "venture_ids", "displease_venture_ids"
+]
+
+# Tipo arrow de cada tipo de campo do Odoo nas perguntas de texto; os demais
+# (char, text, selection pelo rótulo) e campos inexistentes viram string
+SURVEY_ARROW_TYPES = {
+    "boolean": "bool_",
+    "integer": "int64",
+    "float": "float64",
+    "monetary": "float64",
+    "date": "date32",
+    "many2one": "int64",
+}
+
+
+def compile_survey_schema(lead_model):
+    """Pré-compila os metadados dos campos do survey para o idioma do env.
+
+    Retorna ``(text, options)``: ``text`` é uma tupla de
+    ``(campo, rótulo, tipo, {valor: rótulo da seleção} ou None)`` e
+    ``options`` uma tupla de ``(campo, rótulo, modelo relacionado ou None)``.
+    Campos inexistentes no crm.lead têm tipo None e usam o próprio nome
+    como rótulo.
+    """
+    fields_map = lead_model._fields
+    text = []
+    for name in TEXT_FIELDS:
+        field = fields_map.get(name)
+        selection = None
+        if field and field.type == "selection":
+            options = field.selection(lead_model.env) if callable(field.selection) else field.selection
+            selection = dict(options)
+        text.append((name, field.string if field else name, field.type if field else None, selection))
+    options = []
+    for name in OPTIONS_FIELDS:
+        field = fields_map.get(name)
+        comodel = field.comodel_name if field and field.relational else None
+        options.append((name, field.string if field else name, comodel))
+    return tuple(text), tuple(options)
+
+
+class SurveyExportService:
+    """Serializa leads (crm.lead) no formato do endpoint /api/survey/responses/.
+
+    Os metadados dos campos vêm do schema em ormcache
+    (``crm.lead._get_survey_export_schema``) e os valores da página são lidos
+    com um único ``read``, mais um ``read`` de nomes por modelo relacionado
+    das perguntas de múltipla escolha.
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def _load(self, leads):
+        """Lê os valores do survey das leads e os nomes dos modelos relacionados."""
+        text_schema, options_schema = self.env["crm.lead"]._get_survey_export_schema()
+        existing = [name for name, _label, kind, _sel in text_schema if kind] + [
+            name for name, _label, _comodel in options_schema if name in leads._fields
+        ]
+        rows = leads.sudo().read(["user_id"] + existing, load=None)
+
+        names_by_comodel = {}
+        for name, _label, comodel in options_schema:
+            if not comodel:
+                continue
+            ids = set()
+            for row in rows:
+                value = row[name]
+                ids.update(value if isinstance(value, list) else [value])
+            ids.discard(False)
+            names = names_by_comodel.setdefault(comodel, {})
+            missing = list(ids - names.keys())
+            if missing:
+                for rec in self.env[comodel].sudo().browse(missing).read(["name"], load=None):
+                    names[rec["id"]] = rec["name"]
+        return text_schema, options_schema, rows, names_by_comodel
+
+    @staticmethod
+    def _option_names(value, names):
+        ids = value if isinstance(value, list) else [value] if value else []
+        return [names[record_id] for record_id in ids]
+
+    def serialize(self, leads):
+        text_schema, options_schema, rows, names_by_comodel = self._load(leads)
+
+        results = []
+        for row in rows:
+            text_questions = {}
+            for name, label, kind, selection in text_schema:
+                value = row.get(name)
+                if kind == "boolean":
+                    text_questions[label] = value if value is not None else False
+                elif kind == "selection":
+                    text_questions[label] = selection.get(value, value)
+                else:
+                    text_questions[label] = value if value is not None else ""
+
+            options_questions = {}
+            for name, label, comodel in options_schema:
+                value = row.get(name)
+                if comodel:
+                    options_questions[label] = self._option_names(value, names_by_comodel[comodel])
+                else:
+                    options_questions[label] = value if value is not None else ""
+
+            results.append({
+                "lead_id": row["id"],
+                "user_id": row["user_id"] or None,
+                "text_questions": text_questions,
+                "options_questions": options_questions,
+            })
+        return results
+
+    def arrow_schema(self):
+        """Schema arrow com uma coluna tipada por pergunta (nome do campo).
+
+        O rótulo da pergunta, usado como chave no JSON, vai nos metadados
+        da coluna.
+        """
+        text_schema, options_schema = self.env["crm.lead"]._get_survey_export_schema()
+        fields = [pa.field("lead_id", pa.int64()), pa.field("user_id", pa.int64())]
+        for name, label, kind, _selection in text_schema:
+            if kind == "datetime":
+                arrow_type = pa.timestamp("us")
+            else:
+                arrow_type = getattr(pa, SURVEY_ARROW_TYPES.get(kind, "string"))()
+            fields.append(pa.field(name, arrow_type, metadata={"label": label}))
+        for name, label, comodel in options_schema:
+            arrow_type = pa.list_(pa.string()) if comodel else pa.string()
+            fields.append(pa.field(name, arrow_type, metadata={"label": label}))
+        return pa.schema(fields)
+
+    def serialize_columns(self, leads):
+        """Mesmas respostas de ``serialize``, achatadas em colunas por campo."""
+        text_schema, options_schema, rows, names_by_comodel = self._load(leads)
+        columns = {
+            "lead_id": [row["id"] for row in rows],
+            "user_id": [row["user_id"] for row in rows],
+        }
+        for name, _label, kind, selection in text_schema:
+            if kind == "selection":
+                columns[name] = [selection.get(row[name], row[name]) for row in rows]
+            else:
+                columns[name] = [row.get(name) for row in rows]
+        for name, _label, comodel in options_schema:
+            if comodel:
+                names = names_by_comodel[comodel]
+                columns[name] = [self._option_names(row[name], names) for row in rows]
+            else:
+                columns[name] = [row.get(name) for row in rows]
+        return columns
@@ -0,0 +1,247 @@
+import re
+
+from ..utils.arrow_utils import pa
+
+# Coluna de código de mídia (midia) usada por cada stand (stand_id.media_column)
+MEDIA_COLUMNS = {
+    "one": "cod_midia1",
+    "two": "cod_midia2",
+    "three": "cod_midia3",
+    "four": "cod_midia4",
+    "five": "cod_midia5",
+    "six": "cod_midia6",
+}
+# Sufixo numérico removido do nome do canal ("Facebook 2" -> "Facebook")
+MEDIA_SUFFIX_RE = re.compile(r"\s*\d+$")
+
+LEAD_FIELDS = [
+    "partner_id", "user_id", "sales_indicao_id", "team_id", "company_id",
+    "type_of_visit", "type_of_visit2", "fora_do_expediente", "create_date",
+    "creator_user_id", "last_editor_id", "write_date", "chanel_1", "active",
+    "product_category_ids",
+]
+
+# Colunas do formato arrow, na ordem do JSON; type_of é achatado em duas
+# colunas e visit_size vira um map categoria pai -> tamanhos
+VISIT_ARROW_COLUMNS = [
+    ("id", "int64"), ("third_party_id", "string"), ("broker_name", "string"),
+    ("manager_name", "string"), ("superintendent_name", "string"),
+    ("indication_broker_name", "string"), ("sales_company_id", "int64"),
+    ("product_id", "int64"), ("customer_id", "int64"), ("type_of_name", "string"),
+    ("type_of_sub_type_of", "string"), ("out_of_service", "bool_"),
+    ("created", "timestamp"), ("justify_id", "int64"), ("owner", "string"),
+    ("created_by", "int64"), ("changed_by", "int64"), ("changed_when", "timestamp"),
+    ("main_media_id", "string"), ("deleted", "bool_"),
+    ("corretor_account_id_crm", "string"), ("recebido_crm", "bool_"),
+    ("broker_email", "string"), ("product_type_id", "int64"), ("visit_size", "map"),
+]
+
+
+class VisitExportService:
+    """Serializa leads (crm.lead) no formato do endpoint /api/visits/.
+
+    Em vez de percorrer campos relacionais registro a registro, lê as colunas
+    necessárias da página inteira com um ``read`` por modelo e junta os nomes
+    relacionados por mapas id -> valores. Orçamento de consultas por página,
+    que não cresce com o tamanho da página:
+
+    - crm.lead: colunas da página (+1 para product_category_ids);
+    - res.partner (third_party_id) e res.users (vendedores);
+    - modelos de sales_indicao_id e chanel_1 (nomes);
+    - product.category: folhas e seus pais (+1 para child_id);
+    - crm.team.member por email (+1 se houver lead sem vendedor), crm.team e
+      res.users dos gerentes;
+    - res.company, integrações (vendas_ids), stands e midias das companies
+      com selection_base 1 (+1 por campo x2many).
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def _comodel(self, model_name, field_name):
+        return self.env[model_name]._fields[field_name].comodel_name
+
+    def _read_map(self, model_name, ids, fields):
+        ids = list({record_id for record_id in ids if record_id})
+        if not ids:
+            return {}
+        rows = self.env[model_name].sudo().browse(ids).read(fields, load=None)
+        return {row["id"]: row for row in rows}
+
+    def serialize(self, leads):
+        rows = leads.sudo().read(LEAD_FIELDS, load=None)
+
+        partners = self._read_map("res.partner", [r["partner_id"] for r in rows], ["third_party_id"])
+        users = self._read_map("res.users", [r["user_id"] for r in rows], ["name", "login"])
+        indications = self._read_map(
+            self._comodel("crm.lead", "sales_indicao_id"),
+            [r["sales_indicao_id"] for r in rows], ["name"],
+        )
+        sizes_by_category = self._get_sizes_by_category(
+            [cat_id for r in rows for cat_id in r["product_category_ids"]]
+        )
+        members_by_email = self._get_team_members_by_email(rows, users)
+        media_index = self._build_media_index([r["company_id"] for r in rows])
+        channels = self._read_map(
+            self._comodel("crm.lead", "chanel_1"),
+            [r["chanel_1"] for r in rows if r["company_id"] in media_index], ["name"],
+        )
+
+        result = []
+        for row in rows:
+            user = users.get(row["user_id"], {})
+            sales_name, manager_name = members_by_email.get(user.get("login", False), (False, False))
+            indication_name = indications.get(row["sales_indicao_id"], {}).get("name")
+
+            # Agrupa as categorias "folha" (sem filhos) por parent -> [filhos]
+            sizes_by_parent = {}
+            for cat_id in row["product_category_ids"]:
+                size = sizes_by_category.get(cat_id)
+                if size:
+                    sizes_by_parent.setdefault(size[0], []).append(size[1])
+
+            result.append({
+                "id": row["id"],
+                "third_party_id": partners.get(row["partner_id"], {}).get("third_party_id") or None,
+                "broker_name": " - ".join(filter(None, [user.get("name"), sales_name])),
+                "manager_name": manager_name,
+                "superintendent_name": None,
+                "indication_broker_name": indication_name if indication_name and row["type_of_visit2"] == 'Indicação corretor' else None,
+                "sales_company_id": row["team_id"],
+                "product_id": row["company_id"],
+                "customer_id": row["partner_id"],
+                "type_of": {
+                    "name": row["type_of_visit"],
+                    "sub_type_of": row["type_of_visit2"] or None
+                },
+                "out_of_service": row["fora_do_expediente"],
+                "created": row["create_date"] or None,
+                "justify_id": None,
+                "owner": None,
+                "created_by": row["creator_user_id"],
+                "changed_by": row["last_editor_id"],
+                "changed_when": row["write_date"] or None,
+                "main_media_id": self._resolve_main_media_id(row, media_index, channels),
+                "deleted": not row["active"],
+                "corretor_account_id_crm": None,
+                "recebido_crm": False,
+                "broker_email": user.get("login", False),
+                "product_type_id": None,
+                "visit_size": sizes_by_parent,
+            })
+        return result
+
+    @staticmethod
+    def arrow_schema():
+        fields = []
+        for name, kind in VISIT_ARROW_COLUMNS:
+            if kind == "timestamp":
+                arrow_type = pa.timestamp("us")
+            elif kind == "map":
+                arrow_type = pa.map_(pa.string(), pa.list_(pa.string()))
+            else:
+                arrow_type = getattr(pa, kind)()
+            fields.append(pa.field(name, arrow_type))
+        return pa.schema(fields)
+
+    def serialize_columns(self, leads):
+        """Mesmas visitas de ``serialize``, como colunas para o formato arrow."""
+        rows = self.serialize(leads)
+        for row in rows:
+            type_of = row.pop("type_of")
+            row["type_of_name"] = type_of["name"]
+            row["type_of_sub_type_of"] = type_of["sub_type_of"]
+            row["visit_size"] = list(row["visit_size"].items())
+        return {name: [row[name] for row in rows] for name, _kind in VISIT_ARROW_COLUMNS}
+
+    def _get_sizes_by_category(self, category_ids):
+        """Mapeia cada categoria "folha" -> (nome do pai, nome da categoria)."""
+        categories = self._read_map("product.category", category_ids, ["name", "parent_id", "child_id"])
+        parents = self._read_map(
+            "product.category", [c["parent_id"] for c in categories.values()], ["name"]
+        )
+        return {
+            cat_id: (parents.get(cat["parent_id"], {}).get("name") or "Sem categoria pai", cat["name"])
+            for cat_id, cat in categories.items()
+            if not cat["child_id"]
+        }
+
+    def _get_team_members_by_email(self, rows, users):
+        """Mapeia login do vendedor -> (sales_name, nome do gerente do time).
+
+        Equivale a ``search([("email", "=", login)], limit=1)`` por lead, mas
+        em uma única consulta: mantém o primeiro membro na ordem padrão.
+        """
+        TeamMember = self.env["crm.team.member"].sudo()
+        logins = list({user["login"] for user in users.values() if user["login"]})
+        members = TeamMember.browse()
+        if logins:
+            members = TeamMember.search([("email", "in", logins)])
+        if any(not row["user_id"] for row in rows):
+            # Leads sem vendedor buscavam por email = False
+            members |= TeamMember.search([("email", "=", False)], limit=1)
+
+        member_rows = members.read(["email", "sales_name", "crm_team_id"], load=None)
+        teams = self._read_map("crm.team", [m["crm_team_id"] for m in member_rows], ["user_id"])
+        managers = self._read_map("res.users", [t["user_id"] for t in teams.values()], ["name"])
+
+        members_by_email = {}
+        for member in member_rows:
+            team = teams.get(member["crm_team_id"], {})
+            manager_name = managers.get(team.get("user_id"), {}).get("name", False)
+            members_by_email.setdefault(member["email"], (member["sales_name"], manager_name))
+        return members_by_email
+
+    def _build_media_index(self, company_ids):
+        """Índice por company para resolver o main_media_id das leads.
+
+        Para cada company com selection_base 1 guarda ``(colunas, midias)``:
+        ``colunas`` mapeia team_id -> coluna de código da primeira integração
+        (vendas_ids) daquele time e ``midias`` mapeia nome_midia -> linha da
+        primeira midia com esse nome. Assim cada lead é resolvida com dois
+        lookups em dict, em vez de percorrer vendas_ids e midia_ids.
+        """
+        companies = self._read_map("res.company", company_ids, ["selection_base", "vendas_ids", "midia_ids"])
+        companies = {cid: c for cid, c in companies.items() if c["selection_base"] == 1}
+        if not companies:
+            return {}
+
+        vendas_model = self._comodel("res.company", "vendas_ids")
+        midia_model = self._comodel("res.company", "midia_ids")
+        vendas = self._read_map(
+            vendas_model, [v for c in companies.values() for v in c["vendas_ids"]], ["team_id", "stand_id"]
+        )
+        stands = self._read_map(
+            self._comodel(vendas_model, "stand_id"), [v["stand_id"] for v in vendas.values()], ["media_column"]
+        )
+        midias = self._read_map(
+            midia_model, [m for c in companies.values() for m in c["midia_ids"]],
+            ["nome_midia"] + list(MEDIA_COLUMNS.values()),
+        )
+
+        media_index = {}
+        for company_id, company in companies.items():
+            columns_by_team = {}
+            for vendas_id in company["vendas_ids"]:
+                integra = vendas[vendas_id]
+                media_column = stands.get(integra["stand_id"], {}).get("media_column")
+                columns_by_team.setdefault(integra["team_id"], MEDIA_COLUMNS.get(media_column))
+            midias_by_name = {}
+            for midia_id in company["midia_ids"]:
+                midias_by_name.setdefault(midias[midia_id]["nome_midia"], midias[midia_id])
+            media_index[company_id] = (columns_by_team, midias_by_name)
+        return media_index
+
+    def _resolve_main_media_id(self, row, media_index, channels):
+        entry = media_index.get(row["company_id"])
+        if not entry or not row["chanel_1"]:
+            return None
+        columns_by_team, midias_by_name = entry
+        column_name = columns_by_team.get(row["team_id"])
+        if not column_name:
+            return None
+        channel_name = channels.get(row["chanel_1"], {}).get("name") or ""
+        midia = midias_by_name.get(MEDIA_SUFFIX_RE.sub("", channel_name.strip()))
+        if not midia:
+            return None
+        return midia.get(column_name)
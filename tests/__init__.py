@@ -0,0 +1,5 @@
+from . import test_auth_token
+from . import test_geocoding
+from . import test_query_budget
+from . import test_sales_team_export
+from . import test_visit_export
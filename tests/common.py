@@ -0,0 +1,60 @@
+import re
+from urllib.parse import urlencode
+
+from odoo.tests import HttpCase
+
+from ..controllers import midia_controller
+from ..utils import pagination
+
+_SERVER_TIMING_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class ExportApiHttpCase(HttpCase):
+    """Base dos testes HTTP da API: token Bearer e contagem de consultas."""
+
+    def setUp(self):
+        super().setUp()
+        # Sessão apenas com o banco selecionado (as rotas são auth='none')
+        self.authenticate(None, None)
+        token, _exp = self.env['auth.model'].generate_token(self.env.ref('base.user_admin').id)
+        self.api_headers = {'Authorization': 'Bearer %s' % token}
+
+    def api_get(self, path, **params):
+        response = self.url_open(
+            '%s?%s' % (path, urlencode(params)), headers=self.api_headers, timeout=60,
+        )
+        self.assertEqual(response.status_code, 200, response.text[:500])
+        return response
+
+    @staticmethod
+    def reset_request_caches():
+        # Caches de processo que dispensam consultas de uma requisição para a outra
+        pagination._count_cache.clear()
+        midia_controller._media_snapshots.clear()
+
+    def query_count(self, path, **params):
+        """Consultas executadas pelo endpoint, lidas do header Server-Timing."""
+        self.reset_request_caches()
+        response = self.api_get(path, **params)
+        match = _SERVER_TIMING_RE.search(response.headers.get('Server-Timing', ''))
+        self.assertTrue(match, "Endpoint %s sem o header Server-Timing" % path)
+        return int(match.group(1)), response
+
+    def assertQueryBudget(self, path, size_param, page_size, budget, **params):
+        """Compara as consultas de uma página de 1 registro com as de uma página
+        de ``page_size`` registros: o número não pode crescer com a página e
+        não pode passar de ``budget``."""
+        # Aquece ormcache e cache de tokens antes das medições
+        self.api_get(path, **{size_param: page_size}, **params)
+        counts = {}
+        for size in (1, page_size):
+            counts[size], response = self.query_count(path, **{size_param: size}, **params)
+            data = response.json()
+            rows = data['data'] if isinstance(data, dict) else data
+            self.assertEqual(len(rows), size, "Fixtures insuficientes para %s" % path)
+        self.assertEqual(
+            counts[1], counts[page_size],
+            "%s: %d consultas com 1 registro e %d com %d" % (path, counts[1], counts[page_size], page_size),
+        )
+        self.assertLessEqual(counts[page_size], budget, "%s acima do orçamento de consultas" % path)
+        return counts[page_size]
@@ -0,0 +1,60 @@
+import datetime
+
+import jwt
+
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+from ..models import auth_model
+
+
+@tagged('post_install', '-at_install')
+class TestAuthTokenCache(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.AuthModel = cls.env['auth.model']
+        cls.config = cls.AuthModel.search([], limit=1)
+        cls.user_id = cls.env.ref('base.user_admin').id
+
+    def _foreign_token(self, secret):
+        payload = {
+            'user_id': self.user_id,
+            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1),
+            'iat': datetime.datetime.utcnow(),
+        }
+        return jwt.encode(payload, secret, algorithm=self.config.algorithm)
+
+    def test_token_verified_by_other_database_is_rejected(self):
+        # Outro banco servido pelo mesmo processo, com outro secret, já validou o token
+        token = self._foreign_token('secret-de-outro-banco')
+        other_cache = auth_model._get_token_cache('outro_banco_%s' % self.env.cr.dbname)
+        other_cache.set(
+            auth_model._token_digest(token),
+            jwt.decode(token, 'secret-de-outro-banco', algorithms=[self.config.algorithm]),
+        )
+        self.addCleanup(other_cache.clear)
+
+        with self.assertRaises(ValidationError):
+            self.AuthModel.verify_token(token)
+
+    def test_token_rejected_after_secret_rotation(self):
+        token, _exp = self.AuthModel.generate_token(self.user_id)
+        self.assertEqual(self.AuthModel.verify_token(token)['user_id'], self.user_id)
+        # Segunda verificação já vem do cache do banco
+        self.assertEqual(self.AuthModel.verify_token(token)['user_id'], self.user_id)
+
+        self.config.rotate_secret_key()
+        with self.assertRaises(ValidationError):
+            self.AuthModel.verify_token(token)
+
+    def test_token_rejected_after_config_change(self):
+        token, _exp = self.AuthModel.generate_token(self.user_id)
+        self.AuthModel.verify_token(token)
+
+        # Nova configuração (outro registro) passa a valer no lugar da anterior
+        self.config.unlink()
+        self.AuthModel.create({'name': 'Nova configuração', 'algorithm': 'HS256'})
+        with self.assertRaises(ValidationError):
+            self.AuthModel.verify_token(token)
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.products_model import GEOCODE_MAX_ATTEMPTS, GEOCODE_RETRY_MINUTES
+
+NOW = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@tagged('post_install', '-at_install')
+class TestGeocodingQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Products = cls.env['products.model']
+        cls.Queue = cls.env['products.geocode.queue']
+        cls.partner = cls.env['res.partner'].create({
+            'name': 'Stand Central',
+            'street': 'Avenida Paulista, 1000',
+            'city': 'São Paulo',
+            'zip': '01310-100',
+        })
+
+    def setUp(self):
+        super().setUp()
+        # O cron confirma cada parceiro; no teste a transação é desfeita ao final
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.geocode_results = []
+        self.geocoded = []
+
+        def geocode(model, partner):
+            self.geocoded.append(partner.id)
+            result = self.geocode_results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.patch(type(self.Products), '_geocode_partner', geocode)
+
+    def _run_cron(self, now):
+        with freeze_time(now):
+            self.Products._cron_process_geocoding()
+
+    def _item(self):
+        return self.Queue.search([('partner_id', '=', self.partner.id)])
+
+    def test_success_writes_coordinates(self):
+        self.Products.enqueue_geocoding(self.partner.ids)
+        self.geocode_results = [(-23.5614, -46.6559)]
+        self._run_cron(NOW)
+
+        item = self._item()
+        self.assertEqual(item.state, 'done')
+        self.assertEqual(item.attempts, 1)
+        self.assertFalse(item.last_error)
+        self.assertAlmostEqual(self.partner.partner_latitude, -23.5614)
+        self.assertAlmostEqual(self.partner.partner_longitude, -46.6559)
+
+    def test_failure_backoff_doubles(self):
+        self.Products.enqueue_geocoding(self.partner.ids)
+        item = self._item()
+        now = NOW
+        for attempt in range(1, GEOCODE_MAX_ATTEMPTS):
+            self.geocode_results = [None if attempt % 2 else ValueError('timeout')]
+            self._run_cron(now)
+            self.assertEqual(item.state, 'pending')
+            self.assertEqual(item.attempts, attempt)
+            self.assertTrue(item.last_error)
+            delay = timedelta(minutes=GEOCODE_RETRY_MINUTES * 2 ** (attempt - 1))
+            self.assertEqual(item.next_attempt, now + delay)
+
+            # Antes do horário agendado o item não é processado
+            self._run_cron(item.next_attempt - timedelta(seconds=1))
+            self.assertEqual(item.attempts, attempt)
+            now = item.next_attempt
+
+        self.assertEqual(len(self.geocoded), GEOCODE_MAX_ATTEMPTS - 1)
+
+    def test_max_attempts_marks_failed(self):
+        self.Products.enqueue_geocoding(self.partner.ids)
+        item = self._item()
+        now = NOW
+        for _attempt in range(GEOCODE_MAX_ATTEMPTS):
+            self.geocode_results = [None]
+            self._run_cron(now)
+            now = (item.next_attempt or now) + timedelta(minutes=1)
+
+        self.assertEqual(item.state, 'failed')
+        self.assertEqual(item.attempts, GEOCODE_MAX_ATTEMPTS)
+        # Itens que falharam não voltam a ser processados pelo cron
+        self._run_cron(now + timedelta(days=30))
+        self.assertEqual(len(self.geocoded), GEOCODE_MAX_ATTEMPTS)
+
+    def test_failed_requeued_only_on_address_change(self):
+        self.Products.enqueue_geocoding(self.partner.ids)
+        item = self._item()
+        item.write({'state': 'failed', 'attempts': GEOCODE_MAX_ATTEMPTS})
+
+        # Mesmo endereço: continua no cache negativo
+        self.Products.enqueue_geocoding(self.partner.ids)
+        self.assertEqual(item.state, 'failed')
+        self.assertEqual(item.attempts, GEOCODE_MAX_ATTEMPTS)
+
+        # Endereço corrigido: volta para a fila e é processado já na próxima execução
+        self.partner.street = 'Avenida Paulista, 1578'
+        self.Products.enqueue_geocoding(self.partner.ids)
+        self.assertEqual(item.state, 'pending')
+        self.assertEqual(item.attempts, 0)
+        self.assertFalse(item.next_attempt)
+
+        self.geocode_results = [(-23.5613, -46.6565)]
+        self._run_cron(NOW)
+        self.assertEqual(item.state, 'done')
+        self.assertEqual(self.geocoded, [self.partner.id])
+
+    def test_new_items_processed_before_retries(self):
+        other = self.partner.copy({'name': 'Stand Norte'})
+        self.Products.enqueue_geocoding(self.partner.ids)
+        self._item().write({'next_attempt': NOW - timedelta(hours=1), 'attempts': 1})
+        self.Products.enqueue_geocoding(other.ids)
+
+        # Itens nunca tentados (next_attempt vazio) vêm antes das novas tentativas
+        self.geocode_results = [(-23.5, -46.6), (-23.6, -46.7)]
+        self._run_cron(NOW)
+        self.assertEqual(self.geocoded, [other.id, self.partner.id])
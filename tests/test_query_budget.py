@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytz
+
+from odoo.tests import tagged
+
+from .common import ExportApiHttpCase
+
+PAGE_SIZE = 10
+
+# Teto de consultas por requisição de cada endpoint (Server-Timing), já com
+# folga; o que não pode acontecer é o número crescer com o tamanho da página
+QUERY_BUDGETS = {
+    '/api/visits/': 30,
+    '/api/survey/responses/': 15,
+    '/api/clients/': 10,
+    '/api/products/': 20,
+    '/api/sales-teams/': 15,
+    '/api/company-media/': 10,
+}
+
+
+@tagged('post_install', '-at_install')
+class TestQueryBudget(ExportApiHttpCase):
+    """Consultas por página dos endpoints de exportação: a página com
+    PAGE_SIZE registros faz as mesmas consultas que a página com 1."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = cls.env
+        Company = env['res.company']
+        state = env.ref('base.state_br_sp')
+
+        # Nomes e sequência colocam os registros do teste no início das páginas
+        cls.companies = Company.create([
+            {'name': '000 Empreendimento %02d' % i, 'sequence': 0}
+            for i in range(PAGE_SIZE)
+        ])
+        parent_category = env['product.category'].create({'name': '000 Tamanhos'})
+        categories = env['product.category'].create([
+            {
+                'name': '%d m²' % (40 + i),
+                'parent_id': parent_category.id,
+                'which_company_ids': [(6, 0, [company.id])],
+            }
+            for i, company in enumerate(cls.companies)
+        ])
+        for i, company in enumerate(cls.companies):
+            company.midia_ids = [(0, 0, {'nome_midia': 'Midia %02d' % i, 'cod_midia1': 'M%02d' % i})]
+
+        users = env['res.users'].with_context(no_reset_password=True).create([
+            {
+                'name': 'Corretor %02d' % i,
+                'login': 'corretor%02d@example.com' % i,
+                'email': 'corretor%02d@example.com' % i,
+            }
+            for i in range(PAGE_SIZE)
+        ])
+        cls.teams = env['crm.team'].create([
+            {
+                'name': '000 Equipe %02d' % i,
+                'sequence': 0,
+                'user_id': users[i].id,
+                'crm_team_member_ids': [(0, 0, {'user_id': users[i].id})],
+            }
+            for i in range(PAGE_SIZE)
+        ])
+
+        customers = env['res.partner'].create([
+            {'name': '000 Cliente %02d' % i, 'state_id': state.id, 'street': 'Rua %d' % i}
+            for i in range(PAGE_SIZE)
+        ])
+        cls.company = cls.companies[0]
+        env['crm.lead'].create([
+            {
+                'name': 'Visita %02d' % i,
+                'company_id': cls.company.id,
+                'partner_id': customers[i].id,
+                'user_id': users[i].id,
+                'team_id': cls.teams[i].id,
+                'product_category_ids': [(6, 0, categories[i].ids)],
+            }
+            for i in range(PAGE_SIZE)
+        ])
+        cls.today = datetime.now(pytz.timezone('America/Sao_Paulo')).date().isoformat()
+
+    def test_visits(self):
+        self.assertQueryBudget(
+            '/api/visits/', 'page_size', PAGE_SIZE, QUERY_BUDGETS['/api/visits/'],
+            page=1, company_id=self.company.id,
+        )
+
+    def test_survey_responses(self):
+        self.assertQueryBudget(
+            '/api/survey/responses/', 'limit', PAGE_SIZE, QUERY_BUDGETS['/api/survey/responses/'],
+            page=1, company_id=self.company.id,
+        )
+
+    def test_clients(self):
+        self.assertQueryBudget(
+            '/api/clients/', 'page_size', PAGE_SIZE, QUERY_BUDGETS['/api/clients/'],
+            page=1, start_date=self.today, end_date=self.today,
+        )
+
+    def test_products(self):
+        self.assertQueryBudget(
+            '/api/products/', 'limit', PAGE_SIZE, QUERY_BUDGETS['/api/products/'], page=1,
+        )
+
+    def test_sales_teams(self):
+        self.assertQueryBudget(
+            '/api/sales-teams/', 'page_size', PAGE_SIZE, QUERY_BUDGETS['/api/sales-teams/'], page=1,
+        )
+
+    def test_company_media(self):
+        self.assertQueryBudget(
+            '/api/company-media/', 'page_size', PAGE_SIZE, QUERY_BUDGETS['/api/company-media/'], page=1,
+        )
@@ -0,0 +1,63 @@
+from odoo.tests import tagged
+
+from .common import ExportApiHttpCase
+
+SALES_TEAMS_PATH = '/api/sales-teams/'
+
+
+@tagged('post_install', '-at_install')
+class TestSalesTeamExport(ExportApiHttpCase):
+
+    def setUp(self):
+        super().setUp()
+        # Permite o mesmo corretor em várias equipes
+        self.env['ir.config_parameter'].sudo().set_param('sales_team.membership_multi', True)
+        self.users = self.env['res.users'].with_context(no_reset_password=True).create([
+            {
+                'name': 'Corretor %02d' % i,
+                'login': 'corretor.equipe%02d@example.com' % i,
+                'email': 'corretor.equipe%02d@example.com' % i if i % 3 else False,
+            }
+            for i in range(20)
+        ])
+
+    def _create_teams(self, count, members_per_team):
+        teams = self.env['crm.team'].create([{'name': 'Equipe %02d' % i} for i in range(count)])
+        for index, team in enumerate(teams):
+            # Ordem de inclusão diferente da ordem dos ids dos usuários, e o
+            # mesmo corretor repetido em equipes diferentes
+            users = self.users[index % 3:][:members_per_team]
+            for user in reversed(users):
+                self.env['crm.team.member'].create({'crm_team_id': team.id, 'user_id': user.id})
+        return teams
+
+    def _get_all_teams(self):
+        return self.query_count(SALES_TEAMS_PATH, page=1, page_size=1000)
+
+    def test_query_count_independent_of_members(self):
+        self._create_teams(2, 1)
+        self.api_get(SALES_TEAMS_PATH, page=1, page_size=1000)
+        small, _response = self._get_all_teams()
+
+        self._create_teams(15, 12)
+        large, response = self._get_all_teams()
+        self.assertEqual(len(response.json()['data']), self.env['crm.team'].search_count([]))
+        self.assertEqual(
+            small, large,
+            "get_sales_teams: %d consultas com poucos membros e %d com muitos" % (small, large),
+        )
+
+    def test_brokers_match_member_ids(self):
+        teams = self._create_teams(4, 6)
+        # Vínculo arquivado não aparece em member_ids
+        self.env['crm.team.member'].search([('crm_team_id', '=', teams[0].id)], limit=1).active = False
+        self.env.invalidate_all()
+
+        _count, response = self._get_all_teams()
+        brokers_by_team = {team['id']: team['brokers'] for team in response.json()['data']}
+        for team in teams:
+            expected = [
+                {"id": user.id, "name": user.name, "email": user.email or ""}
+                for user in team.member_ids
+            ]
+            self.assertEqual(brokers_by_team[team.id], expected, "Corretores divergentes em %s" % team.name)
@@ -0,0 +1,66 @@
+"""Saída colunar em Arrow IPC (stream) para as exportações.
+
+pyarrow é opcional: sem ele ``pa`` é None e os endpoints recusam
+``format=arrow``. Os serviços de exportação descrevem as colunas com
+``(nome, tipo arrow)`` e entregam cada lote como dict nome -> lista de
+valores; aqui os valores do ORM são normalizados (``False`` vira nulo fora
+das colunas booleanas) e os lotes são escritos como record batches.
+"""
+import io
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from .streaming import STREAM_BATCH_SIZE, stream_response
+
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+ARROW_UNAVAILABLE = "O formato 'arrow' requer o pacote pyarrow instalado no servidor."
+
+
+def _normalize(value, arrow_type):
+    if pa.types.is_boolean(arrow_type):
+        return bool(value) if value is not None else None
+    if value is False or value is None:
+        return None
+    if pa.types.is_string(arrow_type) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def record_batch(schema, columns):
+    """Monta um RecordBatch tipado a partir de ``{coluna: [valores]}``."""
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if not (pa.types.is_list(field.type) or pa.types.is_map(field.type)):
+            values = [_normalize(value, field.type) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _drain(sink):
+    # Reaproveita o mesmo buffer: só o lote corrente fica em memória
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def arrow_response(env, model_name, domain, schema, to_columns, after_id=None, batch_size=STREAM_BATCH_SIZE):
+    """Resposta em Arrow IPC stream, um record batch por lote do domain.
+
+    ``to_columns(env, records)`` retorna as colunas do lote no formato de
+    ``record_batch``.
+    """
+    def encode(stream_env, batches):
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for records in batches:
+                writer.write_batch(record_batch(schema, to_columns(stream_env, records)))
+                yield _drain(sink)
+        # Marcador de fim do stream escrito ao fechar o writer
+        yield _drain(sink)
+
+    return stream_response(env, model_name, domain, encode, ARROW_CONTENT_TYPE, after_id, batch_size)
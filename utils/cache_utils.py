@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache LRU limitado em que cada entrada expira em um instante absoluto (epoch)."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] is not None and item[1] <= now:
+                del self._data[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, expires_at=None):
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_if(self, predicate):
+        """Remove as entradas cujo valor satisfaz ``predicate``."""
+        with self._lock:
+            for key in [k for k, (v, _exp) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
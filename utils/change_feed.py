@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytz
+
+from .date_utils import parse_date
+
+# Linhas gravadas nos últimos segundos ainda não entram no feed: o write_date
+# do Odoo é o início da transação, e uma transação longa pode confirmar
+# depois que o watermark já passou daquele instante.
+CHANGE_FEED_LAG_SECONDS = 60
+
+
+def encode_watermark(write_date, last_id, tombstone_id):
+    """Gera o watermark opaco: posição em (write_date, id) e última exclusão vista."""
+    raw = json.dumps(
+        {"w": write_date.isoformat(), "id": last_id, "t": tombstone_id},
+        separators=(",", ":"),
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_watermark(value):
+    """Retorna ``(write_date, last_id, tombstone_id)`` do parâmetro ``changed_since``.
+
+    Aceita o watermark devolvido pela API ou, na primeira sincronização, uma
+    data/hora local (America/Sao_Paulo) nos formatos de ``parse_date``; nesse
+    caso ``tombstone_id`` é None e as exclusões são filtradas pela data.
+    """
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(data["w"]), int(data["id"]), int(data["t"])
+    except Exception:
+        pass
+    try:
+        since = pytz.timezone("America/Sao_Paulo").localize(parse_date(value))
+    except ValueError:
+        raise ValueError(
+            "O parâmetro 'changed_since' deve ser um watermark retornado pela API "
+            "ou uma data nos formatos YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS ou DD/MM/YYYY."
+        )
+    return since.astimezone(pytz.utc).replace(tzinfo=None), 0, None
+
+
+def read_changes(model, domain, changed_since, limit):
+    """Página do feed incremental de ``model`` a partir de ``changed_since``.
+
+    Percorre o domain (incluindo registros arquivados) em ordem de
+    ``(write_date, id)`` por SQL, para comparar o write_date com precisão de
+    microssegundos, e junta as exclusões físicas registradas em
+    ``export.tombstone`` desde o watermark. Retorna
+    ``(records, deleted_ids, next_watermark, has_next)``.
+    """
+    write_date, last_id, tombstone_id = decode_watermark(changed_since)
+    model = model.with_context(active_test=False)
+    model.flush_model(["write_date"])
+    table = model._table
+    cutoff = datetime.utcnow() - timedelta(seconds=CHANGE_FEED_LAG_SECONDS)
+
+    Tombstone = model.env["export.tombstone"].sudo()
+    if tombstone_id is None:
+        # Primeira sincronização: parte da última exclusão anterior à data
+        previous = Tombstone.search(
+            [("model_name", "=", model._name), ("create_date", "<", write_date)],
+            order="id desc", limit=1,
+        )
+        tombstone_id = previous.id or 0
+
+    query = model._where_calc(domain)
+    query.add_where(f'("{table}"."write_date", "{table}"."id") > (%s, %s)', [write_date, last_id])
+    query.add_where(f'"{table}"."write_date" < %s', [cutoff])
+    query.order = f'"{table}"."write_date", "{table}"."id"'
+    query.limit = limit + 1
+    query_str, params = query.select(f'"{table}"."id"', f'"{table}"."write_date"')
+    model.env.cr.execute(query_str, params)
+    rows = model.env.cr.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        last_id, write_date = rows[-1]
+
+    tombstones = Tombstone.search_read(
+        [
+            ("model_name", "=", model._name),
+            ("id", ">", tombstone_id),
+            ("create_date", "<", cutoff),
+        ],
+        ["res_id"], order="id", limit=limit + 1,
+    )
+    has_next = has_next or len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    if tombstones:
+        tombstone_id = tombstones[-1]["id"]
+
+    records = model.browse([row[0] for row in rows])
+    deleted_ids = [row["res_id"] for row in tombstones]
+    return records, deleted_ids, encode_watermark(write_date, last_id, tombstone_id), has_next
+
@@ -0,0 +1,77 @@
+"""Compressão das respostas negociada pelo header Accept-Encoding.
+
+gzip está sempre disponível; brotli e zstd são usados apenas quando os
+pacotes ``brotli``/``zstandard`` estão instalados e o cliente os aceita.
+Os níveis priorizam CPU baixa: o JSON das exportações é muito repetitivo
+e já comprime bem nos níveis rápidos.
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Corpos menores que isso não compensam o custo (e o cabeçalho) da compressão
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Ordem de preferência do servidor quando o cliente aceita mais de uma
+SUPPORTED_ENCODINGS = tuple(
+    encoding for encoding, available in (
+        ('br', brotli is not None),
+        ('zstd', zstandard is not None),
+        ('gzip', True),
+    ) if available
+)
+
+
+def negotiate_encoding(accept_encodings):
+    """Melhor encoding aceito (``request.httprequest.accept_encodings``) ou None."""
+    return accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks, encoding):
+    """Comprime um corpo gerado sob demanda, pedaço a pedaço.
+
+    Cada pedaço é descarregado (flush) logo após ser comprimido, para que o
+    cliente continue recebendo os lotes à medida que são gerados.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    elif encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield compressor.flush()
+    else:
+        # wbits=31: formato gzip (cabeçalho e CRC), e não deflate puro
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,79 @@
+import hashlib
+
+from odoo.http import request, Response
+
+from .compression import COMPRESSION_MIN_SIZE, compress, negotiate_encoding
+from .json_utils import dumps
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def json_response(data, status=200, headers=None):
+    """Resposta JSON padrão da API.
+
+    ``data`` é serializado com o encoder compartilhado (``json_utils``);
+    se já vier codificado (bytes), é usado como corpo sem nova serialização.
+    Corpos a partir de ``COMPRESSION_MIN_SIZE`` são comprimidos conforme o
+    Accept-Encoding da requisição.
+    """
+    body = data if isinstance(data, bytes) else dumps(data)
+    response_headers = [('Content-Type', JSON_CONTENT_TYPE)]
+    if headers:
+        response_headers += list(headers)
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        response_headers.append(('Vary', 'Accept-Encoding'))
+        encoding = negotiate_encoding(request.httprequest.accept_encodings)
+        if encoding:
+            body = compress(body, encoding)
+            response_headers.append(('Content-Encoding', encoding))
+            # O corpo comprimido é outra representação: o ETag passa a ser fraco
+            response_headers = [
+                (name, f'W/{value}' if name == 'ETag' and not value.startswith('W/') else value)
+                for name, value in response_headers
+            ]
+    return Response(body, status=status, headers=response_headers)
+
+
+def table_fingerprint(model, domain=None):
+    """Resumo barato do estado de uma tabela: (total, maior write_date, maior id).
+
+    Muda sempre que um registro é criado, alterado ou removido, e custa uma
+    única agregação sobre índices, sem ler as linhas. Com ``domain``, o
+    resumo cobre apenas os registros do domain.
+    """
+    if domain is None:
+        model.env.cr.execute(
+            f'SELECT count(*), max(write_date), max(id) FROM "{model._table}"'
+        )
+    else:
+        table = model._table
+        query = model._where_calc(domain)
+        query_str, params = query.select(
+            'count(*)', f'max("{table}"."write_date")', f'max("{table}"."id")'
+        )
+        model.env.cr.execute(query_str, params)
+    return model.env.cr.fetchone()
+
+
+def compute_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def reference_etag(fingerprints, *parts):
+    """ETag de dados de referência, calculado antes de qualquer leitura.
+
+    Cobre os fingerprints das tabelas e os parâmetros da resposta
+    (``parts``). É o único validador dessas respostas: não há Last-Modified,
+    porque o maior write_date não muda quando um registro é excluído, e um
+    If-Modified-Since avaliado contra ele devolveria 304 com dados antigos.
+    """
+    return compute_etag(request.db, *parts, *fingerprints)
+
+
+def etag_matches(etag):
+    return request.httprequest.if_none_match.contains_weak(etag.strip('"'))
+
+
+def not_modified_response(etag):
+    return Response(status=304, headers=[('ETag', etag)])
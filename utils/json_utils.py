@@ -0,0 +1,35 @@
+"""Codificação JSON única para todas as respostas da API.
+
+Usa orjson quando instalado (serialização em C, bem mais rápida e com menos
+memória) e cai para o ``json`` da biblioteca padrão caso contrário. Nos dois
+casos a saída é UTF-8 sem escapes ``\\uXXXX`` (equivalente a
+``ensure_ascii=False``) e datas/datetimes são serializados em ISO 8601,
+de modo que os controllers não precisam chamar ``.isoformat()``.
+"""
+import datetime
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENGINE = "orjson" if orjson is not None else "json"
+
+
+def _default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        """Serializa ``data`` em JSON e retorna bytes UTF-8."""
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data):
+        """Serializa ``data`` em JSON e retorna bytes UTF-8."""
+        return json.dumps(data, ensure_ascii=False, default=_default).encode()
@@ -0,0 +1,91 @@
+import base64
+import json
+
+from .cache_utils import TTLCache
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+# Contagens exatas reaproveitadas entre as páginas de um mesmo crawl
+# (mesmo modelo e mesmo domain, o que inclui a janela de datas).
+_count_cache = TTLCache(maxsize=256, ttl=120)
+
+
+def encode_cursor(last_id):
+    """Gera o cursor opaco que aponta para o registro seguinte a ``last_id``."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Retorna o último id visto, ou None para a primeira página (cursor vazio)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    if not isinstance(last_id, int):
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return last_id
+
+
+def keyset_search(model, domain, cursor, limit):
+    """Busca paginada por cursor (keyset) ordenada por id.
+
+    Ao contrário de ``offset``, o custo de cada página não cresce com a
+    profundidade do crawl e registros criados durante a varredura não
+    deslocam as páginas seguintes. Retorna ``(records, next_cursor)``, sendo
+    ``next_cursor`` None na última página.
+    """
+    last_id = decode_cursor(cursor)
+    if last_id:
+        domain = domain + [("id", ">", last_id)]
+    records = model.search(domain, order="id", limit=limit + 1)
+    if len(records) > limit:
+        records = records[:limit]
+        return records, encode_cursor(records[-1].id)
+    return records, None
+
+
+def offset_search(model, domain, offset, limit):
+    """Busca paginada por offset que deduz ``has_next`` buscando ``limit + 1``."""
+    records = model.search(domain, offset=offset, limit=limit + 1)
+    return records[:limit], len(records) > limit
+
+
+def parse_count_mode(value):
+    mode = value or "exact"
+    if mode not in COUNT_MODES:
+        raise ValueError(
+            "O parâmetro 'count' deve ser um dos valores: %s." % ", ".join(COUNT_MODES)
+        )
+    return mode
+
+
+def count_records(model, domain, mode="exact"):
+    """Total de registros do domain conforme o modo pedido pelo cliente.
+
+    - ``exact``: ``search_count``, em cache por alguns minutos para que as
+      páginas seguintes do mesmo crawl não repitam a varredura;
+    - ``estimate``: estimativa do planner do PostgreSQL (sem varredura);
+    - ``none``: nenhuma contagem, retorna None.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        return estimate_count(model, domain)
+    key = (model.env.cr.dbname, model._name, repr(domain))
+    total = _count_cache.get(key)
+    if total is None:
+        total = model.search_count(domain)
+        _count_cache.set(key, total)
+    return total
+
+
+def estimate_count(model, domain):
+    query = model._where_calc(domain)
+    query_str, params = query.select()
+    model.env.cr.execute("EXPLAIN (FORMAT JSON) " + query_str, params)
+    plan = model.env.cr.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
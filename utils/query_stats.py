@@ -0,0 +1,92 @@
+import logging
+import re
+import time
+from collections import Counter
+from functools import wraps
+
+_logger = logging.getLogger(__name__)
+
+# A partir de quantas repetições de uma mesma consulta o endpoint é sinalizado
+DUPLICATE_THRESHOLD = 5
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def sql_fingerprint(query):
+    """Normaliza uma consulta SQL trocando literais e parâmetros por '?'."""
+    normalized = _LITERAL_RE.sub("?", str(query))
+    normalized = _IN_LIST_RE.sub("(?...)", normalized)
+    return _SPACE_RE.sub(" ", normalized).strip()
+
+
+class QueryStats:
+    """Conta e cronometra as consultas executadas em um cursor.
+
+    Usado como context manager: enquanto ativo, ``cr.execute`` é envolvido
+    para registrar cada consulta; ao sair, o método original é restaurado.
+    """
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __enter__(self):
+        cr = self.cr
+        self._previous = cr.__dict__.get("execute")
+        execute = cr.execute
+
+        def instrumented_execute(query, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return execute(query, *args, **kwargs)
+            finally:
+                self.duration += time.perf_counter() - start
+                self.count += 1
+                self.queries.append(query)
+
+        cr.execute = instrumented_execute
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._previous is None:
+            del self.cr.execute
+        else:
+            self.cr.execute = self._previous
+
+    def fingerprints(self):
+        return Counter(sql_fingerprint(query) for query in self.queries)
+
+    def server_timing(self):
+        return 'db;dur=%.1f;desc="%d queries"' % (self.duration * 1000, self.count)
+
+
+def instrument_queries(f):
+    """Registra número, tempo e fingerprints das consultas de um endpoint.
+
+    Adiciona o header ``Server-Timing`` à resposta, loga o resumo em DEBUG e
+    emite um WARNING para consultas repetidas ``DUPLICATE_THRESHOLD`` vezes
+    ou mais (padrão N+1). O orçamento de consultas de cada endpoint é
+    verificado pelos testes (``tests/test_query_budget.py``), que leem o
+    ``Server-Timing``.
+    """
+    @wraps(f)
+    def wrapper(self, *args, **kwargs):
+        from odoo.http import request
+
+        with QueryStats(request.env.cr) as stats:
+            response = f(self, *args, **kwargs)
+        response.headers["Server-Timing"] = stats.server_timing()
+        path = request.httprequest.path
+        _logger.debug("%s: %d consultas em %.1f ms", path, stats.count, stats.duration * 1000)
+        for fingerprint, repeated in stats.fingerprints().items():
+            if repeated >= DUPLICATE_THRESHOLD:
+                _logger.warning(
+                    "%s: consulta repetida %d vezes: %s", path, repeated, fingerprint[:300]
+                )
+        return response
+
+    return wrapper
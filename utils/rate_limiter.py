@@ -0,0 +1,87 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class SlidingWindowRateLimiter:
+    """Rate limiter de janela deslizante compartilhado entre workers.
+
+    O estado fica em um pequeno banco SQLite local em modo WAL, visível a
+    todos os processos do prefork. Cada verificação é uma única transação
+    curta (dezenas de microssegundos) e não toca no ORM nem no PostgreSQL.
+
+    A janela deslizante é aproximada pela contagem da janela fixa atual somada
+    à contagem da janela anterior, ponderada pelo tempo que ainda se sobrepõe.
+    """
+
+    _CLEANUP_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                " key TEXT PRIMARY KEY,"
+                " window_start REAL NOT NULL,"
+                " previous INTEGER NOT NULL,"
+                " current INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, max_attempts, period):
+        """Registra uma tentativa para ``key``.
+
+        Retorna ``0`` quando a tentativa é permitida ou, caso contrário, o
+        número de segundos até uma nova tentativa ser aceita. Em caso de falha
+        do armazenamento a tentativa é permitida (fail-open).
+        """
+        now = time.time()
+        window_start = (now // period) * period
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT window_start, previous, current FROM rate_limit WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                previous = current = 0
+                if row:
+                    if row[0] == window_start:
+                        previous, current = row[1], row[2]
+                    elif row[0] == window_start - period:
+                        previous = row[2]
+                elapsed = now - window_start
+                if previous * (1 - elapsed / period) + current >= max_attempts:
+                    conn.execute("COMMIT")
+                    return max(1, math.ceil(period - elapsed))
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit VALUES (?, ?, ?, ?, ?)",
+                    (key, window_start, previous, current + 1, window_start + 2 * period),
+                )
+                self._calls += 1
+                if self._calls % self._CLEANUP_EVERY == 0:
+                    conn.execute("DELETE FROM rate_limit WHERE expires_at < ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            _logger.warning("Rate limiter indisponível (%s): %s", self.path, e)
+        return 0
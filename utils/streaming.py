@@ -0,0 +1,83 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.http import request, Response
+
+from .compression import compress_stream, negotiate_encoding
+from .json_utils import dumps
+
+_logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson; charset=utf-8'
+# Registros lidos e serializados por vez; a memória do worker fica limitada a
+# um lote, independente do tamanho total da exportação.
+STREAM_BATCH_SIZE = 500
+
+
+def iter_batches(model, domain, after_id=None, batch_size=STREAM_BATCH_SIZE):
+    """Percorre o domain em lotes ordenados por id (keyset).
+
+    Entre um lote e outro o cache do environment é descartado, para que os
+    registros já enviados não se acumulem em memória.
+    """
+    last_id = after_id or 0
+    while True:
+        records = model.search(domain + [("id", ">", last_id)], order="id", limit=batch_size)
+        if not records:
+            return
+        last_id = records[-1].id
+        yield records
+        if len(records) < batch_size:
+            return
+        model.env.invalidate_all()
+
+
+def stream_response(env, model_name, domain, encode, content_type, after_id=None, batch_size=STREAM_BATCH_SIZE):
+    """Resposta gerada sob demanda a partir dos lotes do domain.
+
+    ``encode(env, batches)`` é um gerador que recebe o iterador de lotes de
+    registros e produz os bytes do corpo. O corpo é consumido pelo werkzeug
+    depois que o controller retorna, quando o cursor da requisição já foi
+    fechado; por isso a leitura usa um cursor próprio, aberto no registry do
+    banco da requisição. A compressão é negociada pelo Accept-Encoding e
+    aplicada lote a lote.
+    """
+    registry = env.registry
+    context = dict(env.context)
+    encoding = negotiate_encoding(request.httprequest.accept_encodings)
+
+    def generate():
+        with registry.cursor() as cr:
+            stream_env = api.Environment(cr, SUPERUSER_ID, context)
+            batches = iter_batches(stream_env[model_name], domain, after_id, batch_size)
+            try:
+                yield from encode(stream_env, batches)
+            except Exception:
+                # O status 200 já foi enviado: a conexão é interrompida e o
+                # cliente recebe o corpo truncado
+                _logger.exception("Erro durante a exportação em streaming de %s", model_name)
+                raise
+
+    headers = [
+        ('Content-Type', content_type),
+        ('Vary', 'Accept-Encoding'),
+        # Evita que proxies (nginx) acumulem a resposta inteira antes de repassar
+        ('X-Accel-Buffering', 'no'),
+    ]
+    body = generate()
+    if encoding:
+        body = compress_stream(body, encoding)
+        headers.append(('Content-Encoding', encoding))
+    return Response(body, status=200, headers=headers, direct_passthrough=True)
+
+
+def ndjson_response(env, model_name, domain, serialize, after_id=None, batch_size=STREAM_BATCH_SIZE):
+    """Resposta em NDJSON (um objeto JSON por linha).
+
+    ``serialize(env, records)`` recebe cada lote e retorna a lista de dicts.
+    """
+    def encode(stream_env, batches):
+        for records in batches:
+            yield b"".join(dumps(row) + b"\n" for row in serialize(stream_env, records))
+
+    return stream_response(env, model_name, domain, encode, NDJSON_CONTENT_TYPE, after_id, batch_size)